@@ -5,9 +5,10 @@ Analytics CLI - Command line interface for viewing SchedShare analytics data
 
 import redis
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
 from dotenv import load_dotenv
+from analytics_summary import fetch_summary
 
 load_dotenv()
 
@@ -16,31 +17,8 @@ REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
 
 def get_analytics_summary():
-    """Get analytics summary from Redis"""
-    today = datetime.now().strftime('%Y-%m-%d')
-    
-    # Get today's stats
-    today_stats = redis_client.hgetall(f"analytics:daily:{today}")
-    
-    # Get total stats
-    total_stats = redis_client.hgetall("analytics:total")
-    
-    # Get recent activity (last 7 days)
-    recent_activity = []
-    for i in range(7):
-        date = (datetime.now() - timedelta(days=i)).strftime('%Y-%m-%d')
-        day_stats = redis_client.hgetall(f"analytics:daily:{date}")
-        if day_stats:
-            recent_activity.append({
-                'date': date,
-                'stats': day_stats
-            })
-    
-    return {
-        'today': today_stats,
-        'total': total_stats,
-        'recent': recent_activity
-    }
+    """Get analytics summary from Redis (same pipelined read as the web dashboards)"""
+    return fetch_summary(redis_client)
 
 def print_analytics():
     """Print analytics data in a formatted way"""
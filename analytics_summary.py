@@ -0,0 +1,94 @@
+"""
+Analytics Summary - today's, all-time and last-7-days counters for the dashboards
+All eight hashes are read in one pipelined round trip, and the assembled summary is kept
+in-process for a short window so busy public pages (/watch) cost Redis nothing per view.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_SUMMARY_TTL = float(os.getenv('ANALYTICS_SUMMARY_TTL', 30))  # seconds; 0 disables caching
+RECENT_DAYS = 7
+
+
+def fetch_summary(redis_client, now=None) -> dict:
+    """Read today's, total and recent daily counters in one pipeline"""
+    now = now or datetime.now()
+    dates = [(now - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(RECENT_DAYS)]
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hgetall("analytics:total")
+    for date in dates:
+        pipe.hgetall(f"analytics:daily:{date}")
+    total_stats, *daily = pipe.execute()
+
+    return {
+        'today': daily[0],
+        'total': total_stats,
+        'recent': [{'date': date, 'stats': stats} for date, stats in zip(dates, daily) if stats],
+    }
+
+
+class AnalyticsSummary:
+    """Caches ``fetch_summary`` for ``ttl`` seconds per process.
+
+    One caller refreshes an expired summary while concurrent callers wait for it
+    rather than issuing their own reads. If Redis fails, the last summary is
+    served (stale) when there is one. Callers must treat the result as read-only.
+    Hits are counted under their own lock so cached reads never wait on a refresh.
+    """
+
+    def __init__(self, redis_client, ttl: float = ANALYTICS_SUMMARY_TTL):
+        self.redis = redis_client
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._hits_lock = threading.Lock()
+        self._summary = None
+        self._fetched_at = 0.0
+        self.hits = 0
+        self.refreshes = 0
+        self.stale = 0
+
+    def _fresh(self) -> bool:
+        return self._summary is not None and time.monotonic() - self._fetched_at < self.ttl
+
+    def _hit(self) -> dict:
+        with self._hits_lock:
+            self.hits += 1
+        return self._summary
+
+    def get(self) -> dict:
+        """Return the dashboard summary, fetching it at most once per ``ttl`` seconds"""
+        if self._fresh():
+            return self._hit()
+        with self._lock:
+            if self._fresh():
+                return self._hit()
+            try:
+                summary = fetch_summary(self.redis)
+            except redis.RedisError as e:
+                if self._summary is None:
+                    raise
+                logger.warning('Analytics summary refresh failed, serving stale copy: %s', e)
+                self.stale += 1
+                return self._summary
+            self._summary, self._fetched_at = summary, time.monotonic()
+            self.refreshes += 1
+            return summary
+
+    def stats(self) -> dict:
+        """Process-local counters of this cache"""
+        lookups = self.hits + self.refreshes
+        return {
+            'hits': self.hits,
+            'refreshes': self.refreshes,
+            'stale': self.stale,
+            'hit_rate': round(self.hits / lookups * 100, 1) if lookups else 0,
+            'ttl_seconds': self.ttl,
+        }
@@ -0,0 +1,166 @@
+"""
+Analytics Writer - records track_event calls in one Redis round trip, optionally off the request path
+A Lua script stores the event, bumps the daily and total counters and tags the session atomically;
+the buffered writer queues events in-process and a background thread flushes them in batches.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_WRITE_MODE = os.getenv('ANALYTICS_WRITE_MODE', 'buffered')  # buffered | sync
+ANALYTICS_BUFFER_SIZE = int(os.getenv('ANALYTICS_BUFFER_SIZE', 10000))  # events held before dropping
+ANALYTICS_FLUSH_INTERVAL = float(os.getenv('ANALYTICS_FLUSH_INTERVAL', 1.0))  # seconds
+ANALYTICS_BATCH_SIZE = int(os.getenv('ANALYTICS_BATCH_SIZE', 500))  # events per pipelined flush
+
+EVENT_TTL = 86400 * 30  # 30 days
+SESSION_TTL = 86400 * 7  # 7 days
+
+# KEYS: event, daily counters, total counters[, session set]
+# ARGV: event JSON, event type, event TTL, session TTL
+_RECORD_EVENT = """
+redis.call('SETEX', KEYS[1], ARGV[3], ARGV[1])
+redis.call('HINCRBY', KEYS[2], ARGV[2], 1)
+redis.call('HINCRBY', KEYS[3], ARGV[2], 1)
+if KEYS[4] then
+    redis.call('SADD', KEYS[4], ARGV[2])
+    redis.call('EXPIRE', KEYS[4], ARGV[4])
+end
+return 1
+"""
+
+
+class AnalyticsWriter:
+    """Writes analytics events synchronously, one script call (one round trip) per event"""
+
+    mode = 'sync'
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+        self._script = redis_client.register_script(_RECORD_EVENT)
+        self._lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+
+    def _call(self, event, client=None):
+        event_type, event_json, day, session_id = event
+        keys = [f"analytics:event:{secrets.token_urlsafe(8)}", f"analytics:daily:{day}", "analytics:total"]
+        if session_id:
+            keys.append(f"analytics:session:{session_id}")
+        self._script(keys=keys, args=[event_json, event_type, EVENT_TTL, SESSION_TTL], client=client)
+
+    def write(self, events):
+        """Write a batch of (type, JSON, day, session id) events in one pipelined round trip"""
+        pipe = self.redis.pipeline(transaction=False)
+        for event in events:
+            self._call(event, client=pipe)
+        try:
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning('Dropped %d analytics events: %s', len(events), e)
+            with self._lock:
+                self.failed += len(events)
+            return
+        with self._lock:
+            self.written += len(events)
+
+    def record(self, event_type: str, data: dict, timestamp, session_id=None):
+        """Record one event (``timestamp`` is a datetime) for the dashboards"""
+        self.write([_event(event_type, data, timestamp, session_id)])
+
+    def stats(self) -> dict:
+        """Process-local counters of this writer"""
+        return {'mode': self.mode, 'written': self.written, 'failed': self.failed}
+
+
+class BufferedAnalyticsWriter(AnalyticsWriter):
+    """Queues events in-process and writes them from a background thread in batches.
+
+    ``record`` never waits on Redis: when the bounded buffer is full (Redis slow
+    or down) the event is dropped and counted instead. The thread starts on the
+    first event and again after a fork, so preforking servers are safe.
+    """
+
+    mode = 'buffered'
+
+    def __init__(self, redis_client, max_size: int = ANALYTICS_BUFFER_SIZE,
+                 flush_interval: float = ANALYTICS_FLUSH_INTERVAL, batch_size: int = ANALYTICS_BATCH_SIZE):
+        super().__init__(redis_client)
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_size)
+        self._thread = None
+        self._pid = None
+
+    def record(self, event_type: str, data: dict, timestamp, session_id=None):
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(_event(event_type, data, timestamp, session_id))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                if self.dropped == 1 or self.dropped % 1000 == 0:
+                    logger.warning('Analytics buffer full, %d events dropped so far', self.dropped)
+
+    def _ensure_thread(self):
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked: the parent's thread and queued events are not ours
+                self._queue = queue.Queue(maxsize=self.max_size)
+                self._thread = None
+                self._pid = os.getpid()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='analytics-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            # Flush a batch when it is full or flush_interval after its first event
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get(timeout=max(0, deadline - time.monotonic())))
+            except queue.Empty:
+                pass
+            self.write(batch)
+
+    def flush(self):
+        """Write everything queued so far from the calling thread (e.g. at shutdown)"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        for start in range(0, len(batch), self.batch_size):
+            self.write(batch[start:start + self.batch_size])
+
+    def stats(self) -> dict:
+        return dict(super().stats(), queued=self._queue.qsize(), dropped=self.dropped, max_size=self.max_size)
+
+
+def _event(event_type, data, timestamp, session_id):
+    event_json = json.dumps({'type': event_type, 'timestamp': timestamp.isoformat(), 'data': data or {}})
+    return event_type, event_json, timestamp.strftime('%Y-%m-%d'), session_id
+
+
+def create_analytics_writer(redis_client, mode: str = ANALYTICS_WRITE_MODE) -> AnalyticsWriter:
+    """Writer for ANALYTICS_WRITE_MODE: 'buffered' (default, background flushes) or 'sync'"""
+    if mode == 'sync':
+        return AnalyticsWriter(redis_client)
+    return BufferedAnalyticsWriter(redis_client)
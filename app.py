@@ -1,11 +1,22 @@
 # filepath: /home/chris/github/schedshare/app.py
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
-from flask import Flask, request, redirect, url_for, render_template, flash, session, Response, jsonify
+from flask import Flask, Request, request, redirect, url_for, render_template, flash, session, Response, jsonify
 from werkzeug.utils import secure_filename
-import os, secrets
+import os, secrets, time
+import base64
+import tempfile
 import logging
-from pdf_parser import extract_text_from_pdf, parse_schedule
+from ics_export import iter_ics
+from ics_cache import IcsCache, ics_etag
+from calendar_feed import FeedStore, FeedUnavailable, new_feed_token
+from analytics_writer import create_analytics_writer
+from analytics_summary import AnalyticsSummary
+from parse_cache import ParseCache, content_hash
+from parse_executor import ParseExecutor, ParserBusy, ParseTimeout
+from upload_store import create_upload_store
+from event_creation import EventCreator, RateLimiter
+from event_jobs import JobQueue
 from calendar_providers.google import GoogleCalendarProvider
 from calendar_providers.apple import AppleCalendarProvider
 import pickle
@@ -15,9 +26,7 @@ from flask_session import Session
 import redis
 import json
 from flask_mail import Mail, Message
-from datetime import datetime, timezone, timedelta
-from icalendar import Calendar as ICalendar
-from icalendar import Event as ICalendarEvent
+from datetime import datetime, timezone
 from datetime import datetime
 
 # Set up logger
@@ -29,9 +38,23 @@ load_dotenv()
 
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'pdf'}
+# Uploads are parsed from memory; only written to UPLOAD_FOLDER when retention is enabled
+RETAIN_UPLOADS = os.getenv('RETAIN_UPLOADS', 'false').lower() in ('1', 'true', 'yes')
+UPLOAD_SPOOL_MAX_SIZE = int(os.getenv('UPLOAD_SPOOL_MAX_SIZE', 2 * 1024 * 1024))
+MAX_UPLOAD_SIZE = int(os.getenv('MAX_UPLOAD_SIZE', 16 * 1024 * 1024))
+
+
+class SpooledUploadRequest(Request):
+    """Keep uploaded files in memory up to UPLOAD_SPOOL_MAX_SIZE before spilling to a temp file"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_SIZE, mode='rb+')
+
 
 app = Flask(__name__)
+app.request_class = SpooledUploadRequest
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_SIZE
 app.secret_key = os.getenv('FLASK_SECRET_KEY', 'dev-key-change-in-production')
 
 # Force HTTPS for URL generation
@@ -55,63 +78,66 @@ CALENDAR_PROVIDERS = {
     for provider in [GoogleCalendarProvider(), AppleCalendarProvider()]
 }
 
+# Parse the OAuth client secrets and Calendar discovery document once, before the first request
+CALENDAR_PROVIDERS['google'].preload()
+
 # Redis setup (reuse same URL)
 redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
 
-# Global cache for uploaded course data (keyed by upload_id) - still in memory for now
-UPLOAD_CACHE = {}
+# Content-addressed cache of parse results, shared by every worker through Redis
+parse_cache = ParseCache(redis_client)
+
+# Generated .ics documents, served again (or 304'd) for repeat downloads of a selection
+ics_cache = IcsCache(redis_client)
+
+# Precomputed webcal subscription feeds, polled by calendar clients
+feed_store = FeedStore(redis_client)
+
+# track_event writes: one script call per event, batched off the request path by default
+analytics_writer = create_analytics_writer(redis_client)
+
+# Dashboard counters, read in one pipeline and reused for ANALYTICS_SUMMARY_TTL seconds
+analytics_summary = AnalyticsSummary(redis_client)
+
+# Out-of-request PDF parsing (bounded process pool with per-job deadlines)
+parse_executor = ParseExecutor()
+
+# Concurrent Calendar API inserts behind a token bucket shared by every worker
+event_creator = EventCreator(RateLimiter(redis_client))
+
+# Event creation runs in worker.py; the web app only queues jobs and reports their progress
+job_queue = JobQueue(redis_client)
+
+# Parsed course data for in-flight uploads (keyed by upload_id): in-process, or Redis when
+# UPLOAD_STORE=redis so any worker or container can serve any request
+upload_store = create_upload_store(REDIS_URL)
+
+
+def uploaded_courses():
+    """Return the courses of the session's upload, or flash why not and return None"""
+    upload_id = session.get('upload_id')
+    if not upload_id:
+        flash('Please upload a PDF first.')
+        return None
+    courses = upload_store.get(upload_id)
+    if not courses:
+        flash('Your uploaded schedule has expired. Please upload it again to continue.')
+        logger.info('Upload %s has expired or was evicted', upload_id)
+        return None
+    return courses
 
 # Analytics tracking functions
 def track_event(event_type, data=None):
-    """Track analytics events in Redis with timestamps"""
-    timestamp = datetime.now().isoformat()
-    event_data = {
-        'type': event_type,
-        'timestamp': timestamp,
-        'data': data or {}
-    }
-    
-    # Store individual event
-    event_id = f"analytics:event:{secrets.token_urlsafe(8)}"
-    redis_client.setex(event_id, 86400 * 30, json.dumps(event_data))  # 30 days TTL
-    
-    # Update counters
-    today = datetime.now().strftime('%Y-%m-%d')
-    redis_client.hincrby(f"analytics:daily:{today}", event_type, 1)
-    redis_client.hincrby("analytics:total", event_type, 1)
-    
-    # Track unique sessions (if session_id available)
-    if 'session_id' in session:
-        session_key = f"analytics:session:{session['session_id']}"
-        redis_client.sadd(session_key, event_type)
-        redis_client.expire(session_key, 86400 * 7)  # 7 days TTL
+    """Track analytics events in Redis with timestamps.
+
+    The event, its daily/total counters and the session's event set are written
+    together by analytics_writer, in the background unless ANALYTICS_WRITE_MODE=sync.
+    """
+    analytics_writer.record(event_type, data, datetime.now(), session.get('session_id'))
 
 def get_analytics_summary():
-    """Get analytics summary for dashboard"""
-    today = datetime.now().strftime('%Y-%m-%d')
-    
-    # Get today's stats
-    today_stats = redis_client.hgetall(f"analytics:daily:{today}")
-    
-    # Get total stats
-    total_stats = redis_client.hgetall("analytics:total")
-    
-    # Get recent activity (last 7 days)
-    recent_activity = []
-    for i in range(7):
-        date = (datetime.now() - timedelta(days=i)).strftime('%Y-%m-%d')
-        day_stats = redis_client.hgetall(f"analytics:daily:{date}")
-        if day_stats:
-            recent_activity.append({
-                'date': date,
-                'stats': day_stats
-            })
-    
-    return {
-        'today': today_stats,
-        'total': total_stats,
-        'recent': recent_activity
-    }
+    """Get analytics summary for dashboard (shared, briefly cached; see analytics_summary)"""
+    return analytics_summary.get()
 
 # Redis-backed cache helpers for OAUTH_FLOW_CACHE and EVENT_SERVICE_CACHE
 def redis_set_json(key, value, ex=None):
@@ -142,8 +168,58 @@ def redis_get_service(upload_id):
 def redis_pop_service(upload_id):
     return redis_pop_json(f'service:{upload_id}')
 
-# Ensure upload directory exists
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Ensure upload directory exists (only needed when uploads are retained)
+if RETAIN_UPLOADS:
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+
+def encode_selection(indices):
+    """Selected course indices as a hex bitmap, e.g. [0, 1, 3] -> 'b'"""
+    mask = 0
+    for i in indices:
+        mask |= 1 << i
+    return format(mask, 'x')
+
+def apply_selection(courses, selection):
+    """Return the courses whose bit is set in a hex selection bitmap"""
+    mask = int(selection or '0', 16)
+    return [course for i, course in enumerate(courses) if mask >> i & 1]
+
+def selected_courses_for(upload_id, selection):
+    """Resolve an upload reference and selection to Course records ([] if the upload has expired)"""
+    return apply_selection(upload_store.get(upload_id) or [], selection)
+
+def carry_selection(previous, selection, courses):
+    """Selection over ``courses`` of the sections picked from ``previous`` (a re-upload keeps its picks)"""
+    picked = {(course.code, course.section) for course in apply_selection(previous, selection)}
+    return encode_selection(i for i, course in enumerate(courses) if (course.code, course.section) in picked)
+
+def refresh_feed(courses=None):
+    """Republish this browser's webcal feed, if it has one, from its current upload and selection.
+
+    A no-op when the feed already holds that document (same ETag).
+    """
+    token, digest = session.get('feed_token'), session.get('upload_digest')
+    if not token or not digest:
+        return None
+    if courses is None:
+        courses = selected_courses_for(session.get('upload_id'), session.get('selection'))
+    if not courses:
+        return None
+    return feed_store.publish(token, ics_etag(digest, session.get('selection')), courses)
+
+def google_event_link(event_id, calendar_email):
+    """Rebuild a created event's htmlLink from its id and calendar (Google's eid encoding)"""
+    eid = base64.urlsafe_b64encode(f"{event_id} {calendar_email}".encode()).decode().rstrip('=')
+    return f"https://www.google.com/calendar/event?eid={eid}"
+
+def created_event_views(created_events):
+    """Expand the session's (id, summary) pairs into the dicts the templates render"""
+    calendar_email = session.get('calendar_email')
+    return [
+        {'id': event_id, 'summary': summary,
+         'htmlLink': google_event_link(event_id, calendar_email) if event_id and calendar_email else None}
+        for event_id, summary in created_events
+    ]
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -200,19 +276,43 @@ def upload_file():
                 logger.info("No file selected. Redirecting to index.")
                 return redirect(url_for('index'))
             filename = secure_filename(file.filename)
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
-            # Process the PDF and store courses in session
-            text = extract_text_from_pdf(filepath)
-            courses = parse_schedule(text)
+            data = file.read()
+            digest = content_hash(data)
+            courses = parse_cache.get(digest)
+            if RETAIN_UPLOADS:
+                with open(os.path.join(app.config['UPLOAD_FOLDER'], filename), 'wb') as f:
+                    f.write(data)
+            if courses is None:
+                # Process the PDF straight from memory and store courses in session
+                parse_started = time.perf_counter()
+                try:
+                    courses = parse_executor.parse(data)
+                except ParserBusy:
+                    flash('We are processing a lot of schedules right now. Please try again in a few seconds.')
+                    logger.warning('Parse queue full, rejecting upload of %s', filename)
+                    return render_template('index.html'), 503, {'Retry-After': '5'}
+                except ParseTimeout:
+                    flash('Your schedule took too long to process. Please try again.')
+                    logger.warning('Parse timed out for %s', filename)
+                    return redirect(url_for('index'))
+                if courses:
+                    parse_cache.put(digest, courses, int((time.perf_counter() - parse_started) * 1000))
+            else:
+                logger.info('Parse cache hit for %s (%s)', filename, digest[:12])
             if not courses:
                 flash('No courses found in the PDF.')
                 logger.info("No courses found in PDF. Redirecting to index.")
                 return redirect(url_for('index'))
             upload_id = secrets.token_urlsafe(16)
-            UPLOAD_CACHE[upload_id] = courses
+            upload_store.put(upload_id, courses)
+            if session.get('selection'):
+                # Keep the sections picked from the previous upload, so its feed follows the new schedule
+                previous = upload_store.get(session.get('upload_id')) or []
+                session['selection'] = carry_selection(previous, session['selection'], courses)
             session['upload_id'] = upload_id
+            session['upload_digest'] = digest
             session['pdf_filename'] = filename
+            refresh_feed()
             
             # Track successful PDF upload
             track_event('pdf_uploaded', {
@@ -232,22 +332,22 @@ def upload_file():
         logger.info("Exception occurred. Redirecting to index.")
         return redirect(url_for('index'))
 
+@app.errorhandler(413)
+def upload_too_large(e):
+    flash(f'That file is too large. Schedules must be under {MAX_UPLOAD_SIZE // (1024 * 1024)} MB.')
+    return redirect(url_for('upload'))
+
 @app.route('/select-provider')
 def select_provider():
-    if 'upload_id' not in session:
-        flash('Please upload a PDF first.')
+    if uploaded_courses() is None:
         return redirect(url_for('index'))
-    upload_id = session['upload_id']
-    courses = UPLOAD_CACHE.get(upload_id, [])
     return render_template('select_provider.html', providers=CALENDAR_PROVIDERS.values())
 
 @app.route('/confirm')
 def confirm_events():
-    upload_id = session.get('upload_id')
-    courses = UPLOAD_CACHE.get(upload_id, [])
+    courses = uploaded_courses()
     filename = session.get('pdf_filename', None)
-    if not courses:
-        flash('No courses found. Please upload a PDF first.')
+    if courses is None:
         return redirect(url_for('index'))
     course_details = "\n".join([
         f"{course['Course']} - {course['Days']} {course['Start']} - {course['End']}"
@@ -265,30 +365,27 @@ def authorize(provider):
             return redirect(url_for('index'))
         
         upload_id = session.get('upload_id')
-        courses = UPLOAD_CACHE.get(upload_id, [])
+        courses = uploaded_courses()
         
-        if not courses:
-            flash('No courses found. Please upload a PDF first.')
+        if courses is None:
             return redirect(url_for('index'))
         
         if provider == 'apple':
             # For Apple, bypass OAuth and go directly to event selection
-            session['display_courses'] = courses
-            session['display_filename'] = session.get('pdf_filename')
             session['created_events'] = []
             # Store a dummy service entry for Apple
             redis_set_service(upload_id, provider, None)
             logger.info('Apple provider selected, going directly to event selection')
             return redirect(url_for('show_events'))
         else:
-            # For Google, proceed with OAuth flow
-            courses = UPLOAD_CACHE.pop(upload_id, [])
+            # For Google, proceed with OAuth flow for every course in the upload
             provider_instance = CALENDAR_PROVIDERS[provider]
             auth_url, state, flow = provider_instance.get_auth_url()
-            # Store only minimal state (code_verifier if present)
+            # Store only minimal state: the upload reference, selection and code_verifier if present
             code_verifier = getattr(flow, 'code_verifier', None)
             redis_set_json(f'oauth:{state}', {
-                'courses': courses,
+                'upload_id': upload_id,
+                'selection': encode_selection(range(len(courses))),
                 'filename': session.get('pdf_filename'),
                 'provider': provider,
                 'code_verifier': code_verifier,
@@ -330,9 +427,15 @@ def oauth2callback():
             flash('OAuth flow expired or invalid. Please try again.')
             return redirect(url_for('index'))
         
-        selected_courses = cache_entry.get('selected_courses', [])
+        upload_id = cache_entry.get('upload_id')
+        selection = cache_entry.get('selection')
+        selected_courses = selected_courses_for(upload_id, selection)
+        if not selected_courses:
+            flash('Your uploaded schedule has expired. Please upload it again to continue.')
+            return redirect(url_for('index'))
         filename = cache_entry.get('filename')
         code_verifier = cache_entry.get('code_verifier')
+        mode = cache_entry.get('mode', 'create')
         
         # Handle Apple's form_post response mode
         if provider == 'apple' and request.method == 'POST':
@@ -345,52 +448,28 @@ def oauth2callback():
         
         if provider == 'google':
             try:
-                from google_auth_oauthlib.flow import Flow
                 redirect_uri = os.getenv('GOOGLE_REDIRECT_URI', 'https://schedshare.chrislawrence.ca/oauth2callback')
                 logger.info(f"[OAuth2Callback] Using redirect_uri for token exchange: {redirect_uri}")
-                flow = Flow.from_client_secrets_file(
-                    'credentials.json',
-                    scopes=GoogleCalendarProvider.SCOPES,
-                    redirect_uri=redirect_uri
-                )
+                flow = provider_instance.create_flow(redirect_uri)
                 if code_verifier:
                     flow.code_verifier = code_verifier
                 logger.info(f"[OAuth2Callback] Flow redirect_uri: {flow.redirect_uri}")
-                service = provider_instance.handle_callback(auth_response, flow)
+                # Exchanges the authorization code; the worker uses flow.credentials
+                provider_instance.handle_callback(auth_response, flow)
                 
-                created_events = []
-                if selected_courses:
-                    for course in selected_courses:
-                        try:
-                            created_event = provider_instance.create_event(service, course)
-                            created_events.append(created_event)
-                        except Exception as e:
-                            logger.error(f"Error creating event for course {course.get('Course')}: {e}")
-                            flash(f"Error creating event for {course.get('Course')}. It might already exist or there was an API issue.", "warning")
-
-                session['created_events'] = created_events
+                # Hand the inserts to the worker; the progress page follows the job. A sync gets the
+                # whole upload too, so only courses dropped from it (not unticked ones) are deleted
+                schedule = upload_store.get(upload_id) if mode == 'sync' else None
+                job_id = job_queue.enqueue('google', flow.credentials.to_json(), selected_courses, upload_id, mode,
+                                           schedule=schedule, upload_digest=cache_entry.get('digest'))
+                session['job_id'] = job_id
+                session['created_events'] = []
+                session['upload_id'] = upload_id
+                session['selection'] = selection
                 session['pdf_filename'] = filename
                 session['provider'] = 'google'
-                
-                # Track successful Google Calendar event creation
-                track_event('google_events_created', {
-                    'events_created': len(created_events),
-                    'courses_selected': len(selected_courses),
-                    'provider': 'google'
-                })
-                
-                # Track for advanced analytics (if available)
-                try:
-                    from advanced_analytics import analytics
-                    upload_id = session.get('upload_id', 'unknown')
-                    analytics.mark_events_created(upload_id, 'google')
-                except ImportError:
-                    # Advanced analytics not available
-                    pass
-                
-                flash(f"Successfully created {len(created_events)} events.", "success")
-                logger.info(f"Successfully created {len(created_events)} Google Calendar events.")
-                return redirect(url_for('show_confirmation'))
+                logger.info('Queued Google event %s job %s for %d courses', mode, job_id, len(selected_courses))
+                return redirect(url_for('job_progress', job_id=job_id))
 
             except Exception as e:
                 logger.exception('Error during Google event creation')
@@ -411,22 +490,18 @@ def oauth2callback():
 
 @app.route('/events')
 def show_events():
-    upload_id = session.get('upload_id')
-    courses = UPLOAD_CACHE.get(upload_id, [])
-    if not courses:
-        flash('Your session has expired. Please upload your schedule again.')
+    courses = uploaded_courses()
+    if courses is None:
         return redirect(url_for('index'))
     filename = session.get('pdf_filename')
-    created_events = session.pop('created_events', [])
+    created_events = created_event_views(session.pop('created_events', []))
     email_sent = session.pop('email_sent', False)
     return render_template('events.html', courses=courses, filename=filename, created_events=created_events, email_sent=email_sent)
 
 @app.route('/create-events', methods=['POST'])
 def create_selected_events():
-    upload_id = session.get('upload_id')
-    courses = UPLOAD_CACHE.get(upload_id)
-    if not courses:
-        flash('Your session has expired. Please upload your schedule again.')
+    courses = uploaded_courses()
+    if courses is None:
         return redirect(url_for('index'))
 
     selected_indices = request.form.get('selected', '').split(',')
@@ -434,15 +509,20 @@ def create_selected_events():
         flash('You did not select any events to create.')
         return redirect(url_for('show_events'))
     
-    selected_courses = [courses[int(i)] for i in selected_indices if i.isdigit() and 0 <= int(i) < len(courses)]
-    session['selected_courses'] = selected_courses
+    selection = encode_selection(int(i) for i in selected_indices if i.isdigit() and 0 <= int(i) < len(courses))
+    selected_courses = apply_selection(courses, selection)
+    session['selection'] = selection
+    refresh_feed(selected_courses)
     
     provider = request.form.get('provider')
     session['provider'] = provider
+    # Sync: diff against events created by an earlier run instead of adding everything
+    mode = 'sync' if request.form.get('sync') == '1' else 'create'
 
     # Track event creation attempt
     track_event('events_selected', {
         'provider': provider,
+        'mode': mode,
         'courses_selected': len(selected_courses),
         'total_courses_available': len(courses)
     })
@@ -464,9 +544,12 @@ def create_selected_events():
         auth_url, state, flow = provider_instance.get_auth_url()
         code_verifier = getattr(flow, 'code_verifier', None)
         redis_set_json(f'oauth:{state}', {
-            'selected_courses': selected_courses,
+            'upload_id': session.get('upload_id'),
+            'selection': selection,
             'filename': session.get('pdf_filename'),
             'provider': provider,
+            'mode': mode,
+            'digest': session.get('upload_digest'),
             'code_verifier': code_verifier,
         }, ex=600)
         session['state'] = state
@@ -485,25 +568,102 @@ def create_selected_events():
 
 @app.route('/confirmation')
 def show_confirmation():
+    job_id = session.get('job_id')
+    if job_id:
+        job = job_queue.status(job_id)
+        if job is not None and job['status'] not in ('done', 'failed'):
+            return redirect(url_for('job_progress', job_id=job_id))
+        collect_job_results(job)
     created_events = session.get('created_events', [])
-    selected_courses = session.get('selected_courses', [])
+    selected_courses = selected_courses_for(session.get('upload_id'), session.get('selection'))
     
     # For Apple/Outlook, we create a summary from selected_courses
     if not created_events and session.get('provider') == 'apple':
-        created_events = [{'summary': f"{c['Course']} - {c['Section']}"} for c in selected_courses]
+        created_events = [(None, f"{c['Course']} - {c['Section']}") for c in selected_courses]
         session['created_events'] = created_events  # Store for email summary
 
     if not created_events and not selected_courses:
         flash('No events were created or your session has expired.')
         return redirect(url_for('index'))
+    refresh_feed(selected_courses)
 
+    webcal_url, feed_url = feed_urls(session.get('feed_token'))
     return render_template('confirm.html',
-                           created_events=created_events,
+                           webcal_url=webcal_url,
+                           feed_url=feed_url,
+                           created_events=created_event_views(created_events),
                            courses_to_display=selected_courses,
                            filename=session.get('pdf_filename'),
                            email_sent=session.pop('email_sent', False),
                            provider=session.get('provider'))
 
+def collect_job_results(job):
+    """Move a finished event job's results into the session (once) and report them"""
+    session.pop('job_id', None)
+    if job is None:
+        flash('Your calendar events are no longer being tracked. Please check your calendar.', 'warning')
+        return
+    if job['status'] == 'failed':
+        logger.error('Event job %s failed: %s', job['job_id'], job['error'])
+        flash(f"An error occurred creating Google Calendar events: {job['error']}")
+    created_events = job['events']
+    new_events = job['created']
+    session['created_events'] = created_events
+    session['calendar_email'] = job['calendar_email']
+    for course in job['failures']:
+        flash(f"Error creating event for {course}. There was an API issue.", "warning")
+
+    # Track successful Google Calendar event creation
+    track_event('google_events_created', {
+        'events_created': new_events,
+        'events_already_present': job['present'],
+        'events_updated': job['updated'],
+        'events_deleted': job['deleted'],
+        'mode': job['mode'],
+        'courses_selected': job['total'],
+        'provider': 'google'
+    })
+
+    # Track for advanced analytics (if available)
+    try:
+        from advanced_analytics import analytics
+        analytics.mark_events_created(session.get('upload_id', 'unknown'), 'google')
+    except ImportError:
+        # Advanced analytics not available
+        pass
+
+    if new_events:
+        flash(f"Successfully created {new_events} events.", "success")
+    if job['updated']:
+        flash(f"Updated {job['updated']} events that changed since your last sync.", "success")
+    if job['deleted']:
+        flash(f"Removed {job['deleted']} events for courses no longer in your schedule.", "success")
+    if job['present']:
+        flash(f"{job['present']} events were already in your calendar and were left unchanged.", "info")
+    logger.info(f"Successfully created {new_events} Google Calendar events ({job['present']} already present, "
+                f"{job['updated']} updated, {job['deleted']} deleted).")
+
+def job_progress_fields(job):
+    """The subset of a job's status exposed to the browser"""
+    return {key: job.get(key) for key in ('status', 'mode', 'total', 'created', 'present', 'updated', 'deleted',
+                                          'failed', 'error')}
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """JSON progress of this session's event-creation job, polled by progress.html"""
+    job = job_queue.status(job_id) if session.get('job_id') == job_id else None
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job_progress_fields(job))
+
+@app.route('/jobs/<job_id>/progress')
+def job_progress(job_id):
+    job = job_queue.status(job_id) if session.get('job_id') == job_id else None
+    if job is None:
+        return redirect(url_for('show_confirmation'))
+    return render_template('progress.html', job_id=job_id, job=job_progress_fields(job),
+                           filename=session.get('pdf_filename'))
+
 def get_course_details_string(courses):
     if not courses:
         return "No course details available."
@@ -515,6 +675,8 @@ def get_course_details_string(courses):
 @app.route('/clear-session')
 def clear_session():
     upload_id = session.pop('upload_id', None)
+    if upload_id:
+        upload_store.pop(upload_id)
     session.clear()
     flash('Session cleared!')
     # Redirect to home instead of index to avoid potential redirect chains
@@ -531,7 +693,7 @@ def send_email_summary():
         flash('Could not send email. Missing data.')
         return redirect(url_for('show_confirmation'))
 
-    html_body = render_template('email_summary.html', events=created_events)
+    html_body = render_template('email_summary.html', events=created_event_views(created_events))
     msg = Message("Your SchedShare Event Summary",
                   recipients=[email],
                   html=html_body)
@@ -555,7 +717,7 @@ def send_email_summary():
 # Route: Download ICS file
 @app.route('/download-ics', methods=['POST'])
 def download_ics():
-    courses_to_export = session.get('selected_courses', [])
+    courses_to_export = selected_courses_for(session.get('upload_id'), session.get('selection'))
     
     if not courses_to_export:
         flash('No selected courses to export. Your session might have expired.')
@@ -576,70 +738,91 @@ def download_ics():
         # Advanced analytics not available
         pass
 
-    cal = ICalendar()
-    cal.add('prodid', '-//SchedShare//EN')
-    cal.add('version', '2.0')
-
-    for c in courses_to_export:
-        try:
-            e = ICalendarEvent()
-            e.add('summary', f"{c.get('Course', 'N/A')} ({c.get('Section', 'N/A')})")
-            # Set location to full campus address
-            loc = c.get('Location', 'N/A')
-            if 'Nanaimo' in loc:
-                location = "Vancouver Island University, 900 Fifth St, Nanaimo, BC V9R 5S5, Canada"
-            elif 'Cowichan' in loc:
-                location = "Vancouver Island University, Cowichan Campus, 2011 University Way, North Cowichan, BC V9L 0C7, Canada"
-            else:
-                location = loc
-            e.add('location', location)
-            e.add('description', f"Instructor: {c.get('Instructor', 'N/A')}, Status: {c.get('Status', 'N/A')}, Mode: {c.get('DeliveryMode', 'N/A')}")
-            
-            start_dt = _ics_start_datetime(c)
-            end_dt = _ics_end_datetime(c)
-            if start_dt and end_dt:
-                e.add('dtstart', datetime.fromisoformat(start_dt))
-                e.add('dtend', datetime.fromisoformat(end_dt))
-            
-            days_mapping = {"Mo": "MO", "Tu": "TU", "We": "WE", "Th": "TH", "Fr": "FR", "Sa": "SA", "Su": "SU"}
-            days = [days_mapping.get(day) for day in c.get('Days', '').split() if day in days_mapping]
-            
-            if days:
-                semester = c.get('Section', '')[:3]
-                until_date_str = _ics_until_date(c['EndDate'], semester)
-                until_dt = datetime.strptime(until_date_str, '%Y%m%dT%H%M%SZ')
-                e.add('rrule', {'freq': 'weekly', 'byday': days, 'until': until_dt})
-            
-            cal.add_component(e)
-        except Exception as ex:
-            logger.warning(f"Could not create .ics event for course {c.get('Course')}. Error: {ex}")
-            continue
-
-    return Response(
-        cal.to_ical(),
-        mimetype="text/calendar",
-        headers={"Content-disposition": "attachment; filename=schedule.ics"}
-    )
-
-def _ics_start_datetime(course):
-    # Returns ISO string for ics Event begin
-    from datetime import datetime
-    year = int('20' + course['Section'][1:3])
-    dt = datetime.strptime(f"{course['StartDate']} {year} {course['Start']}", '%d-%b %Y %H:%M')
-    return dt.isoformat()
-
-def _ics_end_datetime(course):
-    from datetime import datetime
-    year = int('20' + course['Section'][1:3])
-    dt = datetime.strptime(f"{course['StartDate']} {year} {course['End']}", '%d-%b %Y %H:%M')
-    return dt.isoformat()
-
-def _ics_until_date(date_str, semester):
-    # Returns YYYYMMDDT000000Z for RRULE UNTIL
-    from datetime import datetime
-    year = int('20' + semester[1:3])
-    dt = datetime.strptime(date_str, '%d-%b').replace(year=year)
-    return dt.strftime('%Y%m%dT000000Z')
+    digest = session.get('upload_digest')
+    if not digest:
+        # Upload predates digests in the session: nothing to key a cached copy on
+        return ics_response(iter_ics(courses_to_export))
+    refresh_feed(courses_to_export)
+    # Serve through a GET URL named by the document's ETag so repeats can be cached and 304'd
+    etag = ics_etag(digest, session.get('selection'))
+    return redirect(url_for('download_ics_file', etag=etag), code=303)
+
+@app.route('/download-ics/<etag>.ics')
+def download_ics_file(etag):
+    """Cached .ics for this session's selection; ``etag`` names its exact content"""
+    if request.if_none_match.contains(etag):
+        ics_cache.not_modified()
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    data = ics_cache.get(etag)
+    if data is None:
+        digest = session.get('upload_digest')
+        courses = selected_courses_for(session.get('upload_id'), session.get('selection'))
+        if not digest or not courses or ics_etag(digest, session.get('selection')) != etag:
+            flash('This calendar download has expired. Please select your courses again.')
+            return redirect(url_for('index'))
+        return ics_response(cache_while_streaming(etag, iter_ics(courses)), etag)
+    return ics_response(data, etag)
+
+@app.route('/subscribe-ics', methods=['POST'])
+def subscribe_feed():
+    """Publish the selection as this browser's webcal feed and show its subscription link"""
+    digest = session.get('upload_digest')
+    courses = selected_courses_for(session.get('upload_id'), session.get('selection'))
+    if not courses or not digest:
+        flash('No selected courses to subscribe to. Your session might have expired.')
+        return redirect(url_for('index'))
+    token = session.get('feed_token') or new_feed_token()
+    session['feed_token'] = token
+    if feed_store.publish(token, ics_etag(digest, session.get('selection')), courses) is None:
+        flash('We could not set up your calendar subscription right now. Please try again in a moment.')
+        return redirect(url_for('show_confirmation'))
+    track_event('feed_subscribed', {'courses_count': len(courses)})
+    flash('Your calendar subscription is ready. Calendar apps will pick up changes when you upload a new schedule.',
+          'success')
+    return redirect(url_for('show_confirmation'))
+
+@app.route('/feed/<token>.ics')
+def calendar_feed(token):
+    """webcal subscription: the precomputed feed, answered 304 when the client's copy is current"""
+    try:
+        feed = feed_store.get(token)
+    except FeedUnavailable:
+        # Not a 404: clients may drop a subscription that answers "not found"
+        return Response('Calendar feed temporarily unavailable', status=503, mimetype='text/plain',
+                        headers={'Retry-After': '60'})
+    if feed is None:
+        return Response('Calendar feed not found', status=404, mimetype='text/plain')
+    data, etag, modified = feed
+    response = Response(data, mimetype='text/calendar')
+    response.set_etag(etag)
+    response.last_modified = datetime.fromtimestamp(modified, timezone.utc)
+    response.headers['Cache-Control'] = 'private, max-age=900'
+    return response.make_conditional(request)
+
+def feed_urls(token):
+    """(webcal://, https://) subscription URLs of a feed token, or (None, None)"""
+    if not token:
+        return None, None
+    url = url_for('calendar_feed', token=token, _external=True, _scheme='https')
+    return 'webcal://' + url.split('://', 1)[1], url
+
+def cache_while_streaming(etag, chunks):
+    """Pass ``chunks`` through to the client and cache the whole document once it is complete"""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    ics_cache.put(etag, b''.join(parts))
+
+def ics_response(body, etag=None):
+    response = Response(body, mimetype="text/calendar",
+                        headers={"Content-disposition": "attachment; filename=schedule.ics"})
+    if etag:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, max-age=3600'
+    return response
 
 # Privacy route
 @app.route('/privacy')
@@ -670,7 +853,7 @@ def watch():
             uploads_text = f"{total_uploads}"
         else:
             uploads_text = "dozens of"
-    except (ImportError, AttributeError, KeyError) as e:
+    except (ImportError, AttributeError, KeyError, redis.RedisError) as e:
         # Fallback if analytics not available
         print("Analytics not available")
         print(f"Error: {e}")
@@ -766,6 +949,8 @@ def robots_txt():
         'Disallow: /clear-session',
         'Disallow: /send-email-summary',
         'Disallow: /download-ics',
+        'Disallow: /subscribe-ics',
+        'Disallow: /feed/',
         'Disallow: /authorize/',
         'Disallow: /confirm',
         'Disallow: /select-provider',
@@ -829,6 +1014,29 @@ def analytics_dashboard():
         flash(f"Error loading analytics: {str(e)}")
         return redirect(url_for('index'))
 
+@app.route('/analytics/cache-stats')
+def cache_stats():
+    """JSON counters for the server-side caches and Calendar API event creation"""
+    auth_token = request.args.get('token')
+    expected_token = os.getenv('ANALYTICS_TOKEN', 'schedshare-analytics-2025')
+    
+    if auth_token != expected_token:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    try:
+        return jsonify({
+            'parse_cache': parse_cache.stats(),
+            'upload_store': upload_store.stats(),
+            'ics_cache': ics_cache.stats(),
+            'calendar_feeds': feed_store.stats(),
+            'analytics_writer': analytics_writer.stats(),
+            'analytics_summary': analytics_summary.stats(),
+            'event_creation': event_creator.stats(),
+        })
+    except redis.RedisError as e:
+        logger.exception("Error loading cache stats")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/advanced-analytics')
 def advanced_analytics_dashboard():
     """Advanced analytics dashboard with department/time analysis"""
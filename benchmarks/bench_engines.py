@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Engine Benchmark - compares the extraction engines and text extraction modes
+Usage: python -m benchmarks.bench_engines [PDF ...] [--repeat N]
+"""
+
+import argparse
+import glob
+import statistics
+import time
+
+from pdf_parser import parse_pdf
+
+DEFAULT_PDFS = ['static/DemoCourseSchedule.PDF'] + sorted(glob.glob('uploads/*.[pP][dD][fF]'))
+# (label, engine, extraction mode)
+VARIANTS = [
+    ('text', 'text', 'full'),
+    ('fast', 'text', 'fast'),
+    ('words', 'words', None),
+]
+
+
+def time_variant(data: bytes, engine: str, mode: str, repeat: int):
+    """Return (courses, per-run timings in ms) for one engine/mode on one PDF"""
+    timings = []
+    courses = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        courses = parse_pdf(data, engine, mode)
+        timings.append((time.perf_counter() - started) * 1000)
+    return courses, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark PDF extraction engines')
+    parser.add_argument('pdfs', nargs='*', default=DEFAULT_PDFS, help='Schedule PDFs to parse')
+    parser.add_argument('--repeat', '-n', type=int, default=10, help='Runs per engine per PDF')
+    args = parser.parse_args()
+
+    totals = {label: [] for label, _, _ in VARIANTS}
+    print(f"{'PDF':<40} {'engine':<6} {'courses':>7} {'mean ms':>9} {'min ms':>9}  match")
+    print("-" * 82)
+    for path in args.pdfs:
+        with open(path, 'rb') as f:
+            data = f.read()
+        results = {label: time_variant(data, engine, mode, args.repeat) for label, engine, mode in VARIANTS}
+        reference = results['text'][0]
+        for label, (courses, timings) in results.items():
+            totals[label].extend(timings)
+            match = 'yes' if courses == reference else 'NO'
+            print(f"{path:<40} {label:<6} {len(courses):>7} {statistics.mean(timings):>9.2f} {min(timings):>9.2f}  {match}")
+
+    print("-" * 82)
+    baseline = statistics.mean(totals['text'])
+    for label, timings in totals.items():
+        mean = statistics.mean(timings)
+        print(f"{label:<6} overall mean {mean:8.2f} ms  ({baseline / mean:.2f}x vs text)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+ICS Benchmark - streaming writer (iter_ics) vs the icalendar object model (build_calendar)
+RFC 5545 conformance of the streamed output is covered by tests/test_ics_export.py.
+Usage: python -m benchmarks.bench_ics [--courses N] [--repeat N]
+"""
+
+import argparse
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.synthetic import synthetic_schedule_text
+from ics_export import build_calendar, iter_ics
+from pdf_parser import parse_schedule
+
+
+def measure(render, repeat: int):
+    """(mean ms, mean ms to first chunk, peak KiB) for one way of producing the document"""
+    totals, firsts = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chunks = iter(render())
+        next(chunks)
+        firsts.append((time.perf_counter() - started) * 1000)
+        for _ in chunks:
+            pass
+        totals.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    for _ in render():
+        pass
+    peak = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    return statistics.mean(totals), statistics.mean(firsts), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark streaming ICS export against icalendar')
+    parser.add_argument('--courses', type=int, default=2000, help='Synthetic courses in the large export')
+    parser.add_argument('--repeat', '-n', type=int, default=5, help='Runs per writer')
+    args = parser.parse_args()
+
+    courses = parse_schedule(synthetic_schedule_text(args.courses))
+    writers = {
+        'icalendar': lambda: [build_calendar(courses).to_ical()],
+        'streaming': lambda: iter_ics(courses),
+    }
+    print(f"\n{len(courses)} VEVENTs, {args.repeat} runs")
+    print(f"{'writer':<10} {'mean ms':>9} {'first chunk ms':>15} {'peak KiB':>10}")
+    results = {name: measure(render, args.repeat) for name, render in writers.items()}
+    for name, (total, first, peak) in results.items():
+        print(f"{name:<10} {total:>9.1f} {first:>15.2f} {peak:>10.0f}")
+    old, new = results['icalendar'], results['streaming']
+    print(f"\nstreaming: {old[0] / new[0]:.1f}x faster, {old[2] / new[2]:.0f}x less peak memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Occurrence Benchmark - per-event cost of turning course rows into start/end/UNTIL
+Compares the strptime conversions the providers and ICS export used to repeat per event
+with occurrence.occurrence, cold (caches cleared each run) and warm.
+Usage: python -m benchmarks.bench_occurrence [--courses N] [--repeat N]
+"""
+
+import argparse
+import datetime
+import statistics
+import time
+
+import occurrence
+from benchmarks.synthetic import synthetic_schedule_text
+from pdf_parser import parse_schedule
+
+
+def legacy_occurrence(course):
+    """What GoogleCalendarProvider.convert_to_datetime/convert_to_google_date did per event"""
+    semester = course['Section'][:3]
+    year = int('20' + semester[1:3])
+    days_mapping = {"Mo": 0, "Tu": 1, "We": 2, "Th": 3, "Fr": 4, "Sa": 5, "Su": 6}
+    course_days = [days_mapping[d] for d in course['Days'].split() if d in days_mapping]
+    results = []
+    for time_str in (course['Start'], course['End']):
+        start_date = datetime.datetime.strptime(f"{course['StartDate']} {year}", '%d-%b %Y')
+        while course_days and start_date.weekday() not in course_days:
+            start_date += datetime.timedelta(days=1)
+        results.append(datetime.datetime.combine(start_date, datetime.datetime.strptime(time_str, '%H:%M').time()))
+    until = datetime.datetime.strptime(course['EndDate'], '%d-%b').replace(year=year).strftime('%Y%m%dT000000Z')
+    return results[0], results[1], until
+
+
+def new_occurrence(course):
+    spec = occurrence.occurrence(course)
+    return spec.start, spec.end, spec.until_utc
+
+
+def clear_caches():
+    occurrence.first_meeting.cache_clear()
+    occurrence._date.cache_clear()
+    occurrence._occurrence.cache_clear()
+
+
+def time_per_event(convert, courses, repeat: int, before=None):
+    """Mean microseconds per course over ``repeat`` passes"""
+    timings = []
+    for _ in range(repeat):
+        if before:
+            before()
+        started = time.perf_counter()
+        for course in courses:
+            convert(course)
+        timings.append((time.perf_counter() - started) * 1e6 / len(courses))
+    return statistics.mean(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark course -> occurrence normalisation')
+    parser.add_argument('--courses', type=int, default=500, help='Synthetic courses to convert')
+    parser.add_argument('--repeat', '-n', type=int, default=20, help='Passes over the course list')
+    args = parser.parse_args()
+
+    courses = parse_schedule(synthetic_schedule_text(args.courses))
+    mismatches = sum(legacy_occurrence(c) != new_occurrence(c) for c in courses)
+
+    legacy = time_per_event(legacy_occurrence, courses, args.repeat)
+    cold = time_per_event(new_occurrence, courses, args.repeat, before=clear_caches)
+    warm = time_per_event(new_occurrence, courses, args.repeat)
+    print(f"{len(courses)} meeting rows, {args.repeat} passes, {mismatches} mismatches")
+    print(f"{'strptime (old)':<18} {legacy:8.2f} us/event")
+    print(f"{'occurrence cold':<18} {cold:8.2f} us/event  ({legacy / cold:.1f}x)")
+    print(f"{'occurrence warm':<18} {warm:8.2f} us/event  ({legacy / warm:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
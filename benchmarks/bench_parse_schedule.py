@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+parse_schedule Micro-benchmark - per-row parse cost on large synthetic schedules
+Usage: python -m benchmarks.bench_parse_schedule [--courses N ...] [--repeat N]
+"""
+
+import argparse
+import re
+import time
+
+from config.parser import CAMPUS_LOCATIONS
+from pdf_parser import iter_schedule, parse_schedule
+from benchmarks.synthetic import synthetic_schedule_text
+
+
+def legacy_parse_schedule(text):
+    """The positional parser parse_schedule replaced, kept as the benchmark baseline"""
+    course_dict = {
+        "Course": [],
+        "Section": [],
+        "Location": [],
+        "Days": [],
+        "Start": [],
+        "End": [],
+        "StartDate": [],
+        "EndDate": [],
+        "Status": [],
+        "Instructor": [],
+        "DeliveryMode": []
+    }
+
+    courses = []
+    days_pattern = r"(Mo|Tu|We|Th|Fr|Sa|Su)"
+    lines = text.split('\n')
+
+    i = 0
+    while not lines[i].startswith("Course"):
+        i += 1
+    if lines[i].startswith("Course"):
+        i += 1
+    while i < len(lines):
+        current_course = {key: "" for key in course_dict}
+        line = lines[i].strip()
+        columns = line.split()
+        current_course["Course"] = columns[0] + " " + columns[1]
+        current_course["Section"] = columns[2]
+        current_course["Location"] = columns[3] + " " + columns[4] + " " + columns[5]
+        days_list = [col for col in columns[6:-8] if re.fullmatch(days_pattern, col)]
+        current_course["Days"] = ' '.join(days_list) if days_list else ""
+        current_course["Start"] = columns[-8]
+        current_course["End"] = columns[-7]
+        current_course["StartDate"] = columns[-6]
+        current_course["EndDate"] = columns[-5]
+        current_course["Status"] = columns[-4]
+        current_course["Instructor"] = columns[-3] + " " + columns[-2]
+        current_course["DeliveryMode"] = columns[-1]
+        courses.append(current_course)
+        j = i + 1
+        while j < len(lines) and lines[j].startswith(CAMPUS_LOCATIONS):
+            subsequent_course = {key: "" for key in course_dict}
+            next_line = lines[j].strip()
+            columns = next_line.split()
+            subsequent_course["Course"] = current_course["Course"]
+            subsequent_course["Section"] = current_course["Section"]
+            subsequent_course["Location"] = columns[0] + " " + columns[1] + " " + columns[2]
+            days_list = [col for col in columns[3:-5] if re.fullmatch(days_pattern, col)]
+            subsequent_course["Days"] = ' '.join(days_list) if days_list else ""
+            subsequent_course["Start"] = columns[-5]
+            subsequent_course["End"] = columns[-4]
+            subsequent_course["StartDate"] = columns[-3]
+            subsequent_course["EndDate"] = columns[-2]
+            subsequent_course["Status"] = columns[-1]
+            subsequent_course["Instructor"] = current_course["Instructor"]
+            subsequent_course["DeliveryMode"] = current_course["DeliveryMode"]
+            courses.append(subsequent_course)
+            subsequent_course = {key: "" for key in course_dict}
+            j += 1
+        current_course = {key: "" for key in course_dict}
+        i = j
+    return courses
+
+
+def consume(iterator):
+    count = 0
+    for _ in iterator:
+        count += 1
+    return count
+
+
+def best_of(fn, text, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmark parse_schedule on synthetic schedules')
+    parser.add_argument('--courses', type=int, nargs='+', default=[100, 1000, 10000], help='Courses per schedule')
+    parser.add_argument('--repeat', '-n', type=int, default=5, help='Runs per measurement (best is kept)')
+    args = parser.parse_args()
+
+    implementations = [
+        ('legacy', legacy_parse_schedule),
+        ('parse_schedule', parse_schedule),
+        ('iter_schedule', lambda text: consume(iter_schedule(text))),
+    ]
+    print(f"{'courses':>8} {'rows':>7} {'implementation':<16} {'total ms':>10} {'us/row':>8}")
+    print("-" * 54)
+    for courses in args.courses:
+        text = synthetic_schedule_text(courses)
+        rows = text.count('\n')
+        if legacy_parse_schedule(text) != [course.to_dict() for course in parse_schedule(text)]:
+            raise SystemExit(f"parse_schedule output differs from the legacy parser for {courses} courses")
+        for name, fn in implementations:
+            elapsed = best_of(fn, text, args.repeat)
+            print(f"{courses:>8} {rows:>7} {name:<16} {elapsed * 1000:>10.2f} {elapsed / rows * 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Parser Benchmark Suite - times extract_text_from_pdf and parse_schedule on synthetic PDFs
+Each scenario runs in a fresh process so its peak RSS is measured in isolation.
+
+Usage:
+  python -m benchmarks.run_parser_suite -o results.json
+  python -m benchmarks.run_parser_suite --compare previous.json
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import pdfplumber
+
+from benchmarks.synthetic import synthetic_schedule_pdf
+from pdf_parser import PARSER_ENGINE, PARSER_VERSION, PDF_EXTRACT_MODE, extract_text_from_pdf, parse_schedule
+
+# (name, courses, continuation rate, rows per page)
+SCENARIOS = [
+    ('small', 6, 0.6, 28),
+    ('typical', 10, 0.6, 28),
+    ('large', 40, 0.6, 28),
+    ('multi_page', 120, 0.6, 28),
+    ('no_continuations', 40, 0.0, 28),
+    ('dense_pages', 200, 0.6, 60),
+]
+
+
+def _summary(samples):
+    ordered = sorted(samples)
+    return {
+        'mean_ms': round(statistics.mean(ordered), 3),
+        'min_ms': round(ordered[0], 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+    }
+
+
+def run_scenario(scenario, repeat):
+    """Run one scenario (in a worker process) and return its measurements"""
+    name, courses, continuation_rate, rows_per_page = scenario
+    data, expected_rows = synthetic_schedule_pdf(courses, continuation_rate, rows_per_page)
+    extract_ms, parse_ms = [], []
+    parsed = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        text = extract_text_from_pdf(data)
+        extracted = time.perf_counter()
+        parsed = parse_schedule(text)
+        finished = time.perf_counter()
+        extract_ms.append((extracted - started) * 1000)
+        parse_ms.append((finished - extracted) * 1000)
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        pages = len(pdf.pages)
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_kb = peak_rss // 1024 if sys.platform == 'darwin' else peak_rss
+    return {
+        'scenario': name,
+        'courses': courses,
+        'rows': expected_rows,
+        'pages': pages,
+        'pdf_bytes': len(data),
+        'parsed_rows': len(parsed),
+        'correct': len(parsed) == expected_rows,
+        'extract': _summary(extract_ms),
+        'parse': _summary(parse_ms),
+        'peak_rss_kb': peak_rss_kb,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    previous = {r['scenario']: r for r in (baseline or {}).get('scenarios', [])}
+    print(f"{'scenario':<18} {'rows':>5} {'pages':>5} {'extract ms':>11} {'parse ms':>9} {'peak RSS MB':>12}  ok")
+    print("-" * 70)
+    for r in results:
+        line = (f"{r['scenario']:<18} {r['rows']:>5} {r['pages']:>5} {r['extract']['mean_ms']:>11.2f} "
+                f"{r['parse']['mean_ms']:>9.3f} {r['peak_rss_kb'] / 1024:>12.1f}  {'yes' if r['correct'] else 'NO'}")
+        old = previous.get(r['scenario'])
+        if old:
+            extract_delta = (r['extract']['mean_ms'] / old['extract']['mean_ms'] - 1) * 100
+            parse_delta = (r['parse']['mean_ms'] / old['parse']['mean_ms'] - 1) * 100
+            line += f"  (extract {extract_delta:+.0f}%, parse {parse_delta:+.0f}%)"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the schedule parser on synthetic PDFs')
+    parser.add_argument('--repeat', '-n', type=int, default=5, help='Runs per scenario')
+    parser.add_argument('--scenario', action='append', help='Only run the named scenario(s)')
+    parser.add_argument('--output', '-o', help='Write machine-readable results to this JSON file')
+    parser.add_argument('--compare', help='Previous results JSON to compare against')
+    args = parser.parse_args()
+
+    scenarios = [s for s in SCENARIOS if not args.scenario or s[0] in args.scenario]
+    # One fresh process per scenario so ru_maxrss is that scenario's peak
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(processes=1, maxtasksperchild=1) as pool:
+        results = [pool.apply(run_scenario, (scenario, args.repeat)) for scenario in scenarios]
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'parser_version': PARSER_VERSION,
+        'parser_engine': PARSER_ENGINE,
+        'extract_mode': PDF_EXTRACT_MODE,
+        'python': platform.python_version(),
+        'pdfplumber': pdfplumber.__version__,
+        'repeat': args.repeat,
+        'scenarios': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if not all(r['correct'] for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Synthetic schedule data in the VIU course schedule layout
+"""
+
+import random
+
+from config.parser import CAMPUS_LOCATIONS
+from pdf_parser import TABLE_HEADER
+
+SUBJECTS = ['CSCI', 'MATH', 'PHIL', 'ECON', 'BIOL', 'CHEM', 'ENGL', 'PHYS', 'STAT', 'HIST']
+SURNAMES = ['KABOOM', 'MACARONI', 'BOBROVSKY', 'HUGGY', 'CLEMENTINE', 'OCASIO', 'WESSELS', 'SACKEY']
+GIVEN_NAMES = ['LUIS', 'BEANS', 'DAVID', 'HARRY', 'GARA', 'MELISSA']
+DAY_PATTERNS = ['Mo We', 'Tu Th', 'Mo We Fr', 'Fr', 'Mo', 'Th']
+TERMS = [('F24', '03-SEP', '06-DEC'), ('S25', '06-JAN', '11-APR')]
+
+
+def synthetic_rows(courses: int, continuation_rate: float = 0.6, seed: int = 0):
+    """Return schedule table rows as lists of the 11 cell strings for ``courses`` courses.
+
+    Roughly ``continuation_rate`` of the courses get an extra meeting on a
+    continuation row (blank Course/Section/Instructor/Delivery Mode cells).
+    Each meeting is held on a campus drawn from CAMPUS_LOCATIONS.
+    """
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(courses):
+        term, start_date, end_date = rng.choice(TERMS)
+        course = f"{rng.choice(SUBJECTS)} {rng.randint(100, 499)}"
+        section = f"{term}N{rng.randint(1, 9):02d}"
+        instructor = f"{rng.choice(SURNAMES)} {rng.choice(GIVEN_NAMES)}"
+        meetings = 2 if rng.random() < continuation_rate else 1
+        for meeting in range(meetings):
+            hour = rng.randint(8, 18)
+            meeting_cells = [
+                f"{rng.choice(CAMPUS_LOCATIONS)} {rng.randint(100, 499)} {rng.randint(100, 399)}",
+                rng.choice(DAY_PATTERNS),
+                f"{hour:02d}:{rng.choice(['00', '30'])}",
+                f"{hour + 1:02d}:{rng.choice(['00', '30'])}",
+                start_date, end_date, "Enrolled",
+            ]
+            if meeting == 0:
+                rows.append([course, section] + meeting_cells + [instructor, "Face-to-Face"])
+            else:
+                rows.append(["", ""] + meeting_cells + ["", ""])
+    return rows
+
+
+def synthetic_schedule_text(courses: int, continuation_rate: float = 0.6, seed: int = 0) -> str:
+    """Return schedule text as extract_text_from_pdf would produce it"""
+    rows = synthetic_rows(courses, continuation_rate, seed)
+    return '\n'.join([TABLE_HEADER] + [' '.join(cell for cell in row if cell) for row in rows])
+
+
+# --- PDF generation ---
+# Letter landscape, with the column cell edges of the real schedule table
+PAGE_WIDTH, PAGE_HEIGHT = 792, 612
+CELL_EDGES = [10.8, 64.8, 100.8, 190.8, 280.8, 309.6, 338.4, 381.6, 424.8, 496.8, 676.8, 766.8]
+HEADER_LABELS = ["Course", "Section", "Location", "Days", "Start", "End", "Start Date", "End Date",
+                 "Status", "Instructor", "Delivery Mode"]
+TABLE_TOP = 154.9
+ROW_HEIGHT = 14.4
+FONT_SIZE = 7
+BANNER = ["COURSE SCHEDULE September 9,2024", "Page {page}", "900 FIFTH STREET", "NANAIMO, BC V9R 5S5",
+          "CANADA", "123456789", "Johnny Bloggins"]
+
+
+def _pdf_string(text: str) -> str:
+    return '(' + text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') + ')'
+
+def _text_op(x: float, top: float, text: str) -> str:
+    return f"BT /F1 {FONT_SIZE} Tf {x:.1f} {PAGE_HEIGHT - top - FONT_SIZE:.1f} Td {_pdf_string(text)} Tj ET"
+
+def _page_stream(page_number: int, rows) -> bytes:
+    ops = [_text_op(320, 20 + 12 * i, text.format(page=page_number)) for i, text in enumerate(BANNER)]
+    # Ruled header row with centred labels (Helvetica averages ~0.5em per character)
+    for left, right, label in zip(CELL_EDGES, CELL_EDGES[1:], HEADER_LABELS):
+        ops.append(f"{left:.1f} {PAGE_HEIGHT - TABLE_TOP - ROW_HEIGHT:.1f} {right - left:.1f} {ROW_HEIGHT:.1f} re S")
+        width = len(label) * FONT_SIZE * 0.5
+        ops.append(_text_op((left + right - width) / 2, TABLE_TOP + 3.2, label))
+    for i, row in enumerate(rows, start=1):
+        top = TABLE_TOP + i * ROW_HEIGHT
+        for left, cell in zip(CELL_EDGES, row):
+            if cell:
+                ops.append(_text_op(left + 2.8, top + 3.2, cell))
+    return '\n'.join(ops).encode('latin-1')
+
+def _grid_stream() -> bytes:
+    ops = [_text_op(320, 20, "COURSE SCHEDULE September 9,2024"), _text_op(320, 32, "Page 1")]
+    ops += [_text_op(100 + 130 * i, 150, day) for i, day in enumerate(["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"])]
+    return '\n'.join(ops).encode('latin-1')
+
+def build_pdf(streams) -> bytes:
+    """Assemble a minimal PDF (Helvetica, one content stream per page)"""
+    page_count = len(streams)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        ("<< /Type /Pages /Kids [" + ' '.join(f"{4 + 2 * i} 0 R" for i in range(page_count))
+         + f"] /Count {page_count} >>").encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    for i, stream in enumerate(streams):
+        objects.append((f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                        f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>").encode())
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b''.join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+def synthetic_schedule_pdf(courses: int, continuation_rate: float = 0.6, rows_per_page: int = 28, seed: int = 0):
+    """Return (pdf_bytes, expected_row_count) for a schedule in the VIU layout.
+
+    Page 1 is a weekly-grid placeholder like the real export; the table starts
+    on page 2 and continues, with a repeated header, over as many pages as
+    ``rows_per_page`` requires.
+    """
+    rows = synthetic_rows(courses, continuation_rate, seed)
+    # Keep a continuation row on the same page as its course row
+    pages, current = [], []
+    for row in rows:
+        if len(current) >= rows_per_page and row[0]:
+            pages.append(current)
+            current = []
+        current.append(row)
+    pages.append(current)
+    streams = [_grid_stream()] + [_page_stream(n, page_rows) for n, page_rows in enumerate(pages, start=2)]
+    return build_pdf(streams), len(rows)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Write a synthetic schedule PDF')
+    parser.add_argument('output', help='PDF file to write')
+    parser.add_argument('--courses', type=int, default=10, help='Number of courses')
+    parser.add_argument('--continuation-rate', type=float, default=0.6, help='Share of courses with a second meeting row')
+    parser.add_argument('--rows-per-page', type=int, default=28, help='Table rows per page')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    data, rows = synthetic_schedule_pdf(args.courses, args.continuation_rate, args.rows_per_page, args.seed)
+    with open(args.output, 'wb') as f:
+        f.write(data)
+    print(f"Wrote {args.output}: {rows} rows, {len(data)} bytes")
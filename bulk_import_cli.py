@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Bulk Import CLI - parse whole directories of schedule PDFs in parallel
+Streams results as JSONL (one line per PDF) or one .ics file per PDF, using the
+same parser and ICS builder as the web app. .ics files mirror the input folders
+below their common root, so same-named PDFs in different folders do not clash.
+
+Usage:
+  python bulk_import_cli.py schedules/ --format jsonl -o courses.jsonl
+  python bulk_import_cli.py "backfill/**/*.pdf" --format ics -o ics_out/
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from ics_export import build_ics
+from pdf_parser import parse_pdf
+
+
+def collect_pdfs(inputs):
+    """Expand directories, globs and plain paths into a sorted, de-duplicated list of PDFs"""
+    paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                paths.update(os.path.join(root, f) for f in files if f.lower().endswith('.pdf'))
+        elif any(ch in item for ch in '*?['):
+            paths.update(p for p in glob.glob(item, recursive=True) if p.lower().endswith('.pdf'))
+        elif os.path.isfile(item):
+            paths.add(item)
+        else:
+            print(f"⚠️  Skipping {item}: not a file, directory or matching glob", file=sys.stderr)
+    return sorted(paths)
+
+
+def ics_names(pdfs):
+    """Map each PDF to its .ics path relative to the output directory, mirroring its input folder.
+
+    Returns (names, clashes): a PDF whose name is already taken by an earlier one
+    (a.pdf and a.PDF, or a case-insensitive file system) is left out of ``names``
+    and listed in ``clashes`` as (path, error) instead of overwriting it.
+    """
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in pdfs])
+    names, owners, clashes = {}, {}, []
+    for path in pdfs:
+        name = os.path.splitext(os.path.relpath(os.path.abspath(path), root))[0] + '.ics'
+        owner = owners.setdefault(os.path.normcase(name.lower()), path)
+        if owner == path:
+            names[path] = name
+        else:
+            clashes.append((path, f"{name} would overwrite the output of {owner}"))
+    return names, clashes
+
+
+def parse_file(path, engine=None, mode=None):
+    """Worker: parse one PDF and return (path, courses, error, elapsed seconds)"""
+    started = time.perf_counter()
+    try:
+        courses = parse_pdf(path, engine, mode)
+        return path, courses, None, time.perf_counter() - started
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}", time.perf_counter() - started
+
+
+def write_result(args, path, courses, elapsed, out, name=None):
+    if args.format == 'jsonl':
+        out.write(json.dumps({
+            'file': path,
+            'courses': [course.to_dict() for course in courses],
+            'parse_ms': round(elapsed * 1000, 1),
+        }) + '\n')
+        out.flush()
+    else:
+        target = os.path.join(args.output, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(build_ics(courses))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse schedule PDFs in bulk')
+    parser.add_argument('inputs', nargs='+', help='PDF files, directories or glob patterns')
+    parser.add_argument('--format', choices=['jsonl', 'ics'], default='jsonl', help='Output format')
+    parser.add_argument('--output', '-o',
+                        help='JSONL file (default: stdout) or, for --format ics, output directory (default: ics_out)')
+    parser.add_argument('--workers', '-j', type=int, default=os.cpu_count() or 1,
+                        help='Parallel worker processes (default: all cores)')
+    parser.add_argument('--engine', choices=['text', 'words'], help='Extraction engine (default: PDF_PARSER_ENGINE)')
+    parser.add_argument('--mode', choices=['full', 'fast'], help='Text engine extraction mode (default: PDF_EXTRACT_MODE)')
+    parser.add_argument('--quiet', '-q', action='store_true', help='Only print the final summary')
+    args = parser.parse_args()
+
+    pdfs = collect_pdfs(args.inputs)
+    if not pdfs:
+        print("No PDFs found.", file=sys.stderr)
+        sys.exit(1)
+
+    names, failures = {}, []
+    if args.format == 'ics':
+        args.output = args.output or 'ics_out'
+        os.makedirs(args.output, exist_ok=True)
+        names, failures = ics_names(pdfs)
+        for path, error in failures:
+            if not args.quiet:
+                print(f"❌ {path}: {error}", file=sys.stderr)
+        out = None
+    else:
+        out = open(args.output, 'w') if args.output else sys.stdout
+
+    succeeded, total_courses = 0, 0
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            skipped = {path for path, _ in failures}
+            futures = [executor.submit(parse_file, path, args.engine, args.mode)
+                       for path in pdfs if path not in skipped]
+            for future in as_completed(futures):
+                path, courses, error, elapsed = future.result()
+                if error is None and not courses:
+                    error = "No courses found"
+                if error:
+                    failures.append((path, error))
+                    if not args.quiet:
+                        print(f"❌ {path}: {error} ({elapsed * 1000:.0f} ms)", file=sys.stderr)
+                    continue
+                write_result(args, path, courses, elapsed, out, names.get(path))
+                succeeded += 1
+                total_courses += len(courses)
+                if not args.quiet:
+                    print(f"✅ {path}: {len(courses)} courses ({elapsed * 1000:.0f} ms)", file=sys.stderr)
+    finally:
+        if out not in (None, sys.stdout):
+            out.close()
+    wall = time.perf_counter() - started
+
+    print("=" * 60, file=sys.stderr)
+    print(f"📄 PDFs:        {len(pdfs):>8}", file=sys.stderr)
+    print(f"✅ Parsed:      {succeeded:>8}", file=sys.stderr)
+    print(f"❌ Failed:      {len(failures):>8}", file=sys.stderr)
+    print(f"📚 Courses:     {total_courses:>8}", file=sys.stderr)
+    print(f"⏱️  Wall time:   {wall:>8.2f} s ({args.workers} workers)", file=sys.stderr)
+    print(f"🚀 Throughput:  {len(pdfs) / wall:>8.2f} PDFs/sec", file=sys.stderr)
+    for path, error in failures:
+        print(f"   {path}: {error}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
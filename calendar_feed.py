@@ -0,0 +1,102 @@
+"""
+Calendar Feed - tokenized webcal subscriptions served from precomputed .ics documents in Redis
+A feed is rebuilt only when its upload or selection changes; calendar clients polling it get the
+stored bytes (or a 304) without the parser, the upload store or a session being involved.
+"""
+
+import logging
+import os
+import secrets
+import time
+
+import redis
+
+from ics_export import CALENDAR_HEADER, iter_ics
+
+logger = logging.getLogger(__name__)
+
+CALENDAR_FEED_TTL = int(os.getenv('CALENDAR_FEED_TTL', 86400 * 180))  # unpolled feeds expire after ~a term
+CALENDAR_FEED_REFRESH = os.getenv('CALENDAR_FEED_REFRESH', 'PT12H')  # polling interval suggested to clients
+
+# Calendar name and refresh hints for subscribing clients (Apple Calendar, Outlook, Google "From URL")
+FEED_HEADER = CALENDAR_HEADER + (
+    "X-WR-CALNAME:SchedShare\r\n"
+    f"REFRESH-INTERVAL;VALUE=DURATION:{CALENDAR_FEED_REFRESH}\r\n"
+    f"X-PUBLISHED-TTL:{CALENDAR_FEED_REFRESH}\r\n"
+).encode('ascii')
+
+
+class FeedUnavailable(Exception):
+    """The feed store could not be reached (as opposed to the feed not existing)"""
+
+
+def new_feed_token() -> str:
+    """Unguessable feed id; knowing it is what authorises reading the feed"""
+    return secrets.token_urlsafe(24)
+
+
+class FeedStore:
+    """Feeds as Redis hashes ``feed:<token>`` holding the .ics bytes, its ETag and Last-Modified time.
+
+    Every poll pushes the expiry ``ttl`` seconds out, so feeds in use never lapse.
+    """
+
+    PREFIX = 'feed'
+
+    def __init__(self, redis_client, ttl: int = CALENDAR_FEED_TTL):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.stats_key = f"{self.PREFIX}:stats"
+
+    def _key(self, token: str) -> str:
+        return f"{self.PREFIX}:{token}"
+
+    def publish(self, token: str, etag: str, courses):
+        """Store the feed for ``courses`` unless it already holds ``etag``.
+
+        Returns True if it was rebuilt, False if it was current, and None if Redis
+        failed (logged; the feed keeps its previous content until the next publish).
+        """
+        key = self._key(token)
+        try:
+            if self.redis.hget(key, 'etag') == etag:
+                self.redis.expire(key, self.ttl)
+                return False
+            data = b''.join(iter_ics(courses, header=FEED_HEADER))
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.hset(key, mapping={'ics': data, 'etag': etag, 'modified': int(time.time())})
+            pipe.expire(key, self.ttl)
+            pipe.hincrby(self.stats_key, 'rebuilds', 1)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning('Calendar feed publish failed for %s...: %s', token[:6], e)
+            return None
+        logger.info('Published calendar feed %s... (%d bytes)', token[:6], len(data))
+        return True
+
+    def get(self, token: str):
+        """Return (ics bytes, etag, last-modified epoch seconds) or None for an unknown feed.
+
+        Raises FeedUnavailable if Redis fails, so a blip is not reported as a missing feed.
+        """
+        key = self._key(token)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hmget(key, 'ics', 'etag', 'modified')
+            pipe.expire(key, self.ttl)
+            pipe.hincrby(self.stats_key, 'polls', 1)
+            (data, etag, modified), _, _ = pipe.execute()
+        except redis.RedisError as e:
+            logger.warning('Calendar feed lookup failed for %s...: %s', token[:6], e)
+            raise FeedUnavailable(str(e)) from e
+        if data is None:
+            return None
+        return (data.encode('utf-8') if isinstance(data, str) else data), etag, int(modified)
+
+    def stats(self) -> dict:
+        raw = self.redis.hgetall(self.stats_key)
+        return {
+            'polls': int(raw.get('polls', 0)),
+            'rebuilds': int(raw.get('rebuilds', 0)),
+            'ttl_seconds': self.ttl,
+        }
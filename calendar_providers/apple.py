@@ -2,7 +2,6 @@ from typing import Dict, Any, Tuple
 from .base import CalendarProvider
 import logging
 import os
-from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
@@ -36,18 +35,6 @@ class AppleCalendarProvider(CalendarProvider):
         """Create an event in Apple Calendar."""
         return None
     
-    def _convert_to_datetime(self, date_str: str, time_str: str, semester: str, days: str = None) -> datetime:
-        """Convert date and time strings to datetime object."""
-        year = int('20' + semester[1:3])
-        dt = datetime.strptime(f"{date_str} {year} {time_str}", '%d-%b %Y %H:%M')
-        return dt
-    
-    def _convert_to_google_date(self, date_str: str, semester: str) -> str:
-        """Convert date string to Google Calendar format."""
-        year = int('20' + semester[1:3])
-        dt = datetime.strptime(date_str, '%d-%b').replace(year=year)
-        return dt.strftime('%Y%m%dT000000Z')
-    
     def get_provider_name(self) -> str:
         return "Apple Calendar"
     
@@ -1,5 +1,16 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+
+def split_outcomes(outcomes) -> Tuple[list, list]:
+    """Split ordered (course, event, error) triples into (created, failed) pairs, order kept"""
+    created, failed = [], []
+    for course, event, error in outcomes:
+        if error is None:
+            created.append((course, event))
+        else:
+            failed.append((course, error))
+    return created, failed
 
 class CalendarProvider(ABC):
     """Base class for calendar providers."""
@@ -19,6 +30,32 @@ class CalendarProvider(ABC):
         """Create an event in the calendar."""
         pass
     
+    def create_events(self, service: Any, courses: List[Dict[str, Any]],
+                      fallback: Optional[Callable] = None, on_result: Optional[Callable] = None) -> Tuple[list, list]:
+        """Create events for many courses; returns (created, failed) as (course, event) and (course, error) pairs.
+
+        ``fallback(courses)``, if given, replaces the one-at-a-time loop (e.g. a concurrent retrying
+        creator), reports its own results and returns one (course, event, error) per course, in
+        order. Otherwise ``on_result(course, event, error)`` is called after each course.
+        """
+        return split_outcomes(self.create_each(service, courses, fallback, on_result))
+    
+    def create_each(self, service: Any, courses: List[Dict[str, Any]],
+                    fallback: Optional[Callable] = None, on_result: Optional[Callable] = None) -> list:
+        """Like ``create_events`` but returns one (course, event, error) per course, in course order."""
+        if fallback is not None:
+            return fallback(courses)
+        outcomes = []
+        for course in courses:
+            try:
+                event, error = self.create_event(service, course), None
+            except Exception as e:
+                event, error = None, e
+            outcomes.append((course, event, error))
+            if on_result is not None:
+                on_result(course, event, error)
+        return outcomes
+    
     @abstractmethod
     def get_provider_name(self) -> str:
         """Get the name of the provider."""
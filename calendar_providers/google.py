@@ -1,7 +1,15 @@
-from typing import Dict, Any, Tuple
-from googleapiclient.discovery import build
+from typing import Dict, Any, Callable, List, NamedTuple, Optional, Tuple
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.errors import HttpError
+from course import Course
+from occurrence import occurrence
 from google_auth_oauthlib.flow import Flow
 from .base import CalendarProvider
+import copy
+import functools
+import hashlib
+import json
 import logging
 import os
 import dotenv
@@ -10,10 +18,53 @@ dotenv.load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+CLIENT_SECRETS_FILE = 'credentials.json'
+
+
+@functools.lru_cache(maxsize=1)
+def client_config() -> Dict[str, Any]:
+    """OAuth client secrets, read from CLIENT_SECRETS_FILE once per process."""
+    with open(CLIENT_SECRETS_FILE) as f:
+        return json.load(f)
+
+
+@functools.lru_cache(maxsize=None)
+def discovery_document(api_root: Optional[str] = None) -> str:
+    """Calendar v3 discovery document bundled with google-api-python-client, as a JSON string.
+
+    Read (and re-rooted) once per process. It is kept serialized because the client
+    library mutates the parsed document while building a service, so every build
+    parses its own copy rather than sharing one dict across threads.
+    """
+    document = json.loads(get_static_doc('calendar', 'v3'))
+    if api_root:
+        document['rootUrl'] = api_root.rstrip('/') + '/'
+    return json.dumps(document)
+
+class SyncPlan(NamedTuple):
+    """What a resync has to do: indexes (into the planned courses) to insert or patch,
+    events to delete, and (index, event) pairs already up to date"""
+    insert: list
+    update: list
+    delete: list
+    unchanged: list
+
 class GoogleCalendarProvider(CalendarProvider):
     """Google Calendar provider implementation."""
     
     SCOPES = ['https://www.googleapis.com/auth/calendar.events.owned']
+    BATCH_LIMIT = 50  # Google's maximum number of calls in one batch request
+    # Private extended properties stamped on every event, read back by a resync
+    FINGERPRINT_PROPERTY = 'schedshareFingerprint'
+    SEMESTER_PROPERTY = 'schedshareSemester'
+    UPLOAD_PROPERTY = 'schedshareUpload'  # content hash of the PDF the event came from
+    upload_digest = None  # set per job by for_upload
+    
+    def for_upload(self, digest: Optional[str]) -> 'GoogleCalendarProvider':
+        """Copy of this provider whose events are stamped with upload ``digest``."""
+        provider = copy.copy(self)
+        provider.upload_digest = digest
+        return provider
     
     def get_auth_url(self) -> Tuple[str, str, Any]:
         """Get the Google OAuth URL."""
@@ -23,11 +74,7 @@ class GoogleCalendarProvider(CalendarProvider):
             redirect_uri = redirect_uri.replace('http://', 'https://', 1)
         print(f"[GoogleCalendarProvider] Using redirect_uri for auth: {redirect_uri}")
         print(f"[GoogleCalendarProvider] Requesting scopes: {self.SCOPES}")
-        flow = Flow.from_client_secrets_file(
-            'credentials.json',
-            scopes=self.SCOPES,
-            redirect_uri=redirect_uri
-        )
+        flow = self.create_flow(redirect_uri)
         print(f"[GoogleCalendarProvider] Flow redirect_uri: {flow.redirect_uri}")
         auth_url, state = flow.authorization_url(
             access_type='offline',
@@ -35,37 +82,236 @@ class GoogleCalendarProvider(CalendarProvider):
         )
         return auth_url, state, flow
     
+    def preload(self):
+        """Load the client config and discovery document up front (e.g. at app startup)."""
+        discovery_document(os.getenv('GOOGLE_CALENDAR_API_ROOT'))
+        try:
+            client_config()
+        except OSError as e:
+            logger.warning("Google client secrets not loaded (%s); Google sign-in will fail until they exist", e)
+    
+    def create_flow(self, redirect_uri: str) -> Flow:
+        """OAuth flow from the cached client config (no credentials.json read per request)."""
+        return Flow.from_client_config(client_config(), scopes=self.SCOPES, redirect_uri=redirect_uri)
+    
     def handle_callback(self, auth_response: str, flow: Any) -> Any:
         """Handle the OAuth callback and return the service."""
         print(f"[GoogleCalendarProvider] handle_callback flow.redirect_uri: {flow.redirect_uri}")
         flow.fetch_token(authorization_response=auth_response)
-        return build('calendar', 'v3', credentials=flow.credentials)
+        return self.build_service(flow.credentials)
+    
+    def build_service(self, credentials: Any) -> Any:
+        """Build a Calendar API client from the cached discovery document (no fetch or file read per user).
+        GOOGLE_CALENDAR_API_ROOT points it (batch endpoint included) at another server,
+        e.g. fake_calendar_server.py for local runs."""
+        document = discovery_document(os.getenv('GOOGLE_CALENDAR_API_ROOT'))
+        return build_from_document(document, credentials=credentials)
     
-    def create_event(self, service: Any, course: Dict[str, Any]) -> Dict[str, Any]:
-        """Create an event in Google Calendar."""
+    def create_event(self, service: Any, course: Dict[str, Any], http: Any = None) -> Dict[str, Any]:
+        """Create an event in Google Calendar (optionally over a caller-owned, per-thread ``http``)."""
         # Build the Google event dict from the course dict
         event = self.build_google_event(course)
         logger.info("Google event data: %r", event)
-        created_event = service.events().insert(
+        try:
+            created_event = service.events().insert(
+                calendarId='primary',
+                body=event
+            ).execute(http=http)
+        except HttpError as e:
+            if e.resp.status != 409:
+                raise
+            return self.resolve_conflict(service, event, http=http)
+        return created_event
+    
+    def resolve_conflict(self, service: Any, event: Dict[str, Any], existing: Optional[Dict[str, Any]] = None,
+                         http: Any = None) -> Dict[str, Any]:
+        """Outcome of an insert rejected with 409: an event with this deterministic id already exists.
+
+        Google keeps the ids of deleted events, so ``existing`` (fetched if not
+        given) may be one the user deleted: it is patched back to confirmed and
+        reported as created again. A live one is reported ``already_present``.
+        """
+        if existing is None:
+            existing = service.events().get(calendarId='primary', eventId=event['id']).execute(http=http)
+        if existing.get('status') == 'cancelled':
+            logger.info("Restoring deleted event %s (%s)", event['id'], event['summary'])
+            return dict(self._patch(service, event, http), restored=True)
+        return dict(existing, already_present=True)
+    
+    def update_event(self, service: Any, course: Dict[str, Any], http: Any = None) -> Dict[str, Any]:
+        """Overwrite an existing (or deleted) event with the course's current details."""
+        return dict(self._patch(service, self.build_google_event(course), http), updated=True)
+    
+    def _patch(self, service: Any, event: Dict[str, Any], http: Any = None) -> Dict[str, Any]:
+        event = dict(event, status='confirmed')  # restores an event the user deleted
+        return service.events().patch(
             calendarId='primary',
+            eventId=event['id'],
             body=event
-        ).execute()
-        return created_event
+        ).execute(http=http)
+    
+    def fetch_events(self, service: Any, event_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """events.get for many ids through the batch endpoint; ids that could not be read are left out."""
+        found = {}
+
+        def on_response(request_id, response, exception):
+            if exception is None:
+                found[response['id']] = response
+
+        for start in range(0, len(event_ids), self.BATCH_LIMIT):
+            batch = service.new_batch_http_request(callback=on_response)
+            for event_id in event_ids[start:start + self.BATCH_LIMIT]:
+                batch.add(service.events().get(calendarId='primary', eventId=event_id))
+            try:
+                batch.execute()
+            except Exception as e:
+                logger.warning("Batch lookup of %d events failed: %s", len(event_ids[start:start + self.BATCH_LIMIT]), e)
+        return found
+    
+    def delete_event(self, service: Any, event: Dict[str, Any], http: Any = None) -> Dict[str, Any]:
+        """Delete an event found by ``plan_sync``; one that is already gone counts as deleted."""
+        try:
+            service.events().delete(calendarId='primary', eventId=event['id']).execute(http=http)
+        except HttpError as e:
+            if e.resp.status not in (404, 410):
+                raise
+        return event
+    
+    def synced_events(self, service: Any, semesters) -> Dict[str, Dict[str, Any]]:
+        """Events SchedShare created for ``semesters``, deleted ones included, keyed by event id."""
+        events = {}
+        for semester in sorted(semesters):
+            page_token = None
+            while True:
+                page = service.events().list(
+                    calendarId='primary',
+                    privateExtendedProperty=f"{self.SEMESTER_PROPERTY}={semester}",
+                    showDeleted=True,
+                    maxResults=2500,
+                    pageToken=page_token,
+                    fields='items(id,summary,status,organizer,extendedProperties),nextPageToken'
+                ).execute()
+                events.update((event['id'], event) for event in page.get('items', []))
+                page_token = page.get('nextPageToken')
+                if not page_token:
+                    break
+        return events
+    
+    def plan_sync(self, service: Any, courses: List[Dict[str, Any]],
+                  schedule: Optional[List[Dict[str, Any]]] = None) -> SyncPlan:
+        """Diff ``courses`` against the events already in the calendar for their semesters.
+
+        A course whose event is missing is inserted, one whose fingerprint differs
+        (or whose event was deleted) is patched. Events of those semesters whose
+        course is not in ``schedule`` (every course parsed from the upload, not
+        just the selection) are deleted, so unticking a course never removes it.
+        Without ``schedule`` nothing is deleted, and an event stamped with the
+        current upload is never deleted (its absence would be a parser change).
+        """
+        existing = self.synced_events(service, {Course.coerce(course).semester for course in courses})
+        plan = SyncPlan([], [], [], [])
+        wanted = set()
+        for i, course in enumerate(courses):
+            event = self.build_google_event(course)
+            wanted.add(event['id'])
+            current = existing.get(event['id'])
+            if current is None:
+                plan.insert.append(i)
+            elif current.get('status') == 'cancelled' or self.event_fingerprint(current) != self.event_fingerprint(event):
+                plan.update.append(i)
+            else:
+                plan.unchanged.append((i, dict(current, already_present=True)))
+        if schedule is not None:
+            scheduled = wanted | {Course.coerce(course).event_id for course in schedule}
+            plan.delete.extend(event for event_id, event in existing.items()
+                               if event_id not in scheduled and event.get('status') != 'cancelled'
+                               and not self._from_this_upload(event))
+        logger.info("Sync plan: %d to insert, %d to update, %d to delete, %d unchanged",
+                    len(plan.insert), len(plan.update), len(plan.delete), len(plan.unchanged))
+        return plan
+    
+    @classmethod
+    def event_fingerprint(cls, event: Dict[str, Any]) -> Optional[str]:
+        return event.get('extendedProperties', {}).get('private', {}).get(cls.FINGERPRINT_PROPERTY)
+    
+    def _from_this_upload(self, event: Dict[str, Any]) -> bool:
+        stamped = event.get('extendedProperties', {}).get('private', {}).get(self.UPLOAD_PROPERTY)
+        return self.upload_digest is not None and stamped == self.upload_digest
+    
+    def create_each(self, service: Any, courses: List[Dict[str, Any]],
+                    fallback: Optional[Callable] = None, on_result: Optional[Callable] = None) -> list:
+        """Create events through the batch endpoint, BATCH_LIMIT inserts per HTTP request.
+
+        Returns one (course, event, error) per course, in course order (``create_events``
+        splits them into created and failed pairs). Inserts rejected with 409 are looked up in one more batch
+        and go through ``resolve_conflict``. Items whose own response inside a batch is an error,
+        and every unanswered item of a batch request that failed as a whole, are
+        handed to ``fallback(courses)`` if given, otherwise retried once with a
+        single insert, before being reported as failed. Event ids are deterministic,
+        so replaying an insert the failed batch did commit comes back as a 409 and
+        resolves to the existing event. ``on_result(course, event, error)`` is called
+        as each course's final outcome becomes known.
+        """
+        results = {}
+        conflicts = []
+        bodies = [self.build_google_event(course) for course in courses]
+
+        def on_response(request_id, response, exception):
+            i = int(request_id)
+            if isinstance(exception, HttpError) and exception.resp.status == 409:
+                conflicts.append(i)
+                return
+            results[i] = (response, exception)
+            if exception is None and on_result is not None:
+                on_result(courses[i], response, None)
+
+        batch_failed = []
+        for start in range(0, len(courses), self.BATCH_LIMIT):
+            batch = service.new_batch_http_request(callback=on_response)
+            indexes = range(start, min(start + self.BATCH_LIMIT, len(courses)))
+            for i in indexes:
+                batch.add(service.events().insert(calendarId='primary', body=bodies[i]), request_id=str(i))
+            try:
+                batch.execute()
+            except Exception as e:
+                logger.warning("Batch insert of events %d-%d failed (%s), retrying them individually",
+                               start, indexes[-1], e)
+                batch_failed.extend(i for i in indexes if i not in results and i not in conflicts)
+
+        # Deterministic ids already taken: already in the calendar, or deleted there and to be restored
+        outcomes = {}
+        existing = self.fetch_events(service, [bodies[i]['id'] for i in conflicts])
+        for i in sorted(conflicts):
+            try:
+                event, error = self.resolve_conflict(service, bodies[i], existing.get(bodies[i]['id'])), None
+            except Exception as e:
+                event, error = None, e
+            outcomes[i] = (event, error)
+            if on_result is not None:
+                on_result(courses[i], event, error)
+
+        retry = [i for i, (event, _) in sorted(results.items()) if event is None]
+        for i in retry:
+            logger.warning("Batched insert failed for %s (%s), retrying individually",
+                           courses[i]['Course'], results[i][1])
+        retry = sorted(retry + batch_failed)
+        # Outcomes come back in the order of ``retry``; match them up by position
+        retried = super().create_each(service, [courses[i] for i in retry], fallback, on_result)
+        outcomes.update((i, (event, error)) for i, (_, event, error) in zip(retry, retried))
+
+        ordered = [(course, *(outcomes.get(i) or results[i])) for i, course in enumerate(courses)]
+        failures = sum(event is None for _, event, _ in ordered)
+        logger.info("Created %d Google events in %d batch request(s), %d failed",
+                    len(courses) - failures, -(-len(courses) // self.BATCH_LIMIT), failures)
+        return ordered
     
     def build_google_event(self, course):
-        # (Copy your event-building logic from your old google_calendar.py)
-        # Example:
-        days_mapping = {"Mo": "MO", "Tu": "TU", "We": "WE", "Th": "TH", "Fr": "FR", "Sa": "SA", "Su": "SU"}
-        days = ','.join([days_mapping.get(day, '') for day in course['Days'].split() if day in days_mapping])
-        recurrence_rule = [
-            f"RRULE:FREQ=WEEKLY;BYDAY={days};UNTIL={self.convert_to_google_date(course['EndDate'], course['Section'][:3])}"
-        ]
+        course = Course.coerce(course)
+        spec = occurrence(course)
+        recurrence_rule = [f"RRULE:FREQ=WEEKLY;BYDAY={spec.byday};UNTIL={spec.until_utc}"]
         building_room = course['Location'].split()[-2:]
         building = building_room[0]
         room = building_room[1]
-        semester = course['Section'][:3]
-        start_datetime = self.convert_to_datetime(course['StartDate'], course['Start'], semester, course['Days'])
-        end_datetime = self.convert_to_datetime(course['StartDate'], course['End'], semester, course['Days'])
         summary = f"{course['Course']} - B{building} R{room}"
         # Set location to full campus address
         if 'Nanaimo' in course['Location']:
@@ -75,13 +321,24 @@ class GoogleCalendarProvider(CalendarProvider):
         else:
             location = course['Location']
         event = {
+            # Deterministic id: inserting the same meeting twice returns 409 instead of a duplicate.
+            # Google takes an id or an iCalUID on insert, not both; the .ics UID derives from this id.
+            'id': course.event_id,
             'summary': summary,
             'location': location,
             'description': f"Instructor: {course['Instructor']}, Status: {course['Status']}, DeliveryMode: {course['DeliveryMode']}",
-            'start': {'dateTime': start_datetime.isoformat(), 'timeZone': 'America/Vancouver'},
-            'end': {'dateTime': end_datetime.isoformat(), 'timeZone': 'America/Vancouver'},
+            'start': {'dateTime': spec.start.isoformat(), 'timeZone': spec.timezone},
+            'end': {'dateTime': spec.end.isoformat(), 'timeZone': spec.timezone},
             'recurrence': recurrence_rule,
         }
+        # Hash of everything above, so a resync can tell changed rows from unchanged ones
+        fingerprint = hashlib.sha256(json.dumps(event, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        event['extendedProperties'] = {'private': {
+            self.FINGERPRINT_PROPERTY: fingerprint,
+            self.SEMESTER_PROPERTY: course.semester,
+        }}
+        if self.upload_digest:
+            event['extendedProperties']['private'][self.UPLOAD_PROPERTY] = self.upload_digest
         return event
     
     def get_provider_name(self) -> str:
@@ -92,28 +349,3 @@ class GoogleCalendarProvider(CalendarProvider):
 
     def get_provider_key(self) -> str:
         return "google"
-
-    def convert_to_datetime(self, date_str: str, time_str: str, semester: str, days: str):
-        """Convert PDF date & time strings into a Python datetime (first matching course day)."""
-        import datetime
-        # Extract year from semester code (e.g. 'F24' -> 2024)
-        year = int('20' + semester[1:3])
-        start_date = datetime.datetime.strptime(f"{date_str} {year}", '%d-%b %Y')
-
-        # Advance to first day that the class actually runs on
-        days_mapping = {"Mo": 0, "Tu": 1, "We": 2, "Th": 3, "Fr": 4, "Sa": 5, "Su": 6}
-        course_days = [days_mapping[d] for d in days.split() if d in days_mapping]
-        while start_date.weekday() not in course_days:
-            start_date += datetime.timedelta(days=1)
-
-        start_datetime = datetime.datetime.combine(
-            start_date, datetime.datetime.strptime(time_str, '%H:%M').time()
-        )
-        return start_datetime
-
-    def convert_to_google_date(self, date_str: str, semester: str) -> str:
-        """Return a YYYYMMDDT000000Z string for Google RRULE UNTIL value."""
-        import datetime
-        year = int('20' + semester[1:3])
-        dt = datetime.datetime.strptime(date_str, '%d-%b').replace(year=year)
-        return dt.strftime('%Y%m%dT000000Z') 
\ No newline at end of file
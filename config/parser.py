@@ -0,0 +1,6 @@
+import os
+
+# Campus names that start a continuation row (an extra meeting of the course above it)
+CAMPUS_LOCATIONS = tuple(
+    name.strip() for name in os.getenv('CAMPUS_LOCATIONS', 'Nanaimo,Duncan').split(',') if name.strip()
+)
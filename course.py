@@ -0,0 +1,270 @@
+"""
+Course record - compact typed representation of one schedule table row
+Times are minutes after midnight, days a weekday bitmask and dates proleptic ordinals.
+"""
+
+import hashlib
+import json
+import struct
+from datetime import date
+from functools import lru_cache
+from typing import NamedTuple
+
+DAY_CODES = ("Mo", "Tu", "We", "Th", "Fr", "Sa", "Su")
+DAY_BITS = {code: 1 << i for i, code in enumerate(DAY_CODES)}
+MONTHS = ("JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC")
+MONTH_NUMBERS = {name: i + 1 for i, name in enumerate(MONTHS)}
+# Domain part of the iCalendar UIDs given to exported and API-created events
+UID_DOMAIN = "schedshare.chrislawrence.ca"
+
+# Memoised mask -> 'Mo We' strings (there are at most 128)
+_DAYS_TEXT = {}
+
+
+@lru_cache(maxsize=256)
+def days_to_mask(days: str) -> int:
+    """'Mo We' -> 0b101"""
+    mask = 0
+    for code in days.split():
+        mask |= DAY_BITS.get(code, 0)
+    return mask
+
+def mask_to_days(mask: int) -> str:
+    """0b101 -> 'Mo We'"""
+    text = _DAYS_TEXT.get(mask)
+    if text is None:
+        text = _DAYS_TEXT[mask] = ' '.join(code for i, code in enumerate(DAY_CODES) if mask >> i & 1)
+    return text
+
+@lru_cache(maxsize=2048)
+def time_to_minutes(value: str) -> int:
+    """'13:30' -> 810"""
+    hours, minutes = value.split(':')
+    return int(hours) * 60 + int(minutes)
+
+def minutes_to_time(value: int) -> str:
+    return f"{value // 60:02d}:{value % 60:02d}"
+
+def semester_year(section: str) -> int:
+    """Year of a section's semester code, e.g. 'F24N02' -> 2024"""
+    return 2000 + int(section[1:3])
+
+@lru_cache(maxsize=2048)
+def date_to_ordinal(value: str, year: int) -> int:
+    """'03-SEP' in 2024 -> date(2024, 9, 3).toordinal()"""
+    day, month = value.split('-')
+    return date(year, MONTH_NUMBERS[month.upper()], int(day)).toordinal()
+
+def ordinal_to_date(value: int) -> str:
+    d = date.fromordinal(value)
+    return f"{d.day:02d}-{MONTHS[d.month - 1]}"
+
+
+class Course(NamedTuple):
+    """One meeting row of a schedule.
+
+    Behaves like the legacy 11-key course dict for reads (``course['Start']``,
+    ``course.get('Days')``) so templates, providers and analytics keep working,
+    while storing times, days and dates as small integers. ``in`` tests legacy
+    keys and a Course equals the dict it reads as. Stored as a plain JSON array
+    (see ``dumps_courses``) or a packed binary form; use ``to_dict`` for JSON.
+    ``slot_index`` numbers rows of one upload that share a course, section and
+    time slot (see ``number_slots``); it is not part of the legacy dict.
+    """
+    code: str
+    section: str
+    location: str
+    days: int
+    start: int
+    end: int
+    start_date: int
+    end_date: int
+    status: str
+    instructor: str
+    delivery_mode: str
+    slot_index: int = 0
+
+    @property
+    def semester(self) -> str:
+        return self.section[:3]
+
+    @property
+    def event_id(self) -> str:
+        """Deterministic calendar event id for this meeting row.
+
+        Derived from course, section, semester and time slot (days + start), so
+        re-running an export, a retry or a room change maps to the same event;
+        ``slot_index`` keeps further rows in the same slot (a second room, another
+        date range) apart. 32 hex digits are valid Google event ids (base32hex, 5-1024 chars).
+        """
+        key = f"{self.code}|{self.section}|{self.semester}|{self.days}|{self.start}"
+        if self.slot_index:
+            key += f"|{self.slot_index}"
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+    @property
+    def ical_uid(self) -> str:
+        return f"{self.event_id}@{UID_DOMAIN}"
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try:
+                field, formatter = _LEGACY_KEYS[key]
+            except KeyError:
+                raise KeyError(key) from None
+            value = tuple.__getitem__(self, field)
+            return formatter(value) if formatter else value
+        return tuple.__getitem__(self, key)
+
+    def __contains__(self, key):
+        """Key membership, as for the legacy dict ('Days' in course); not a value search"""
+        return key in _LEGACY_KEYS
+
+    def __eq__(self, other):
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return tuple.__eq__(self, other)
+
+    def __ne__(self, other):
+        if isinstance(other, dict):
+            return self.to_dict() != other
+        return tuple.__ne__(self, other)
+
+    __hash__ = tuple.__hash__
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return _LEGACY_KEYS.keys()
+
+    def items(self):
+        return [(key, self[key]) for key in _LEGACY_KEYS]
+
+    def values(self):
+        return [self[key] for key in _LEGACY_KEYS]
+
+    def to_dict(self) -> dict:
+        """Return the legacy string dict; the form for any JSON leaving the app.
+
+        Being a tuple, a Course passed to json.dumps or ``|tojson`` as-is
+        serialises as an array; only the storage codecs below rely on that.
+        """
+        return dict(self.items())
+
+    @classmethod
+    def from_dict(cls, course: dict) -> 'Course':
+        """Build a Course from a legacy string dict as produced by the parser"""
+        year = semester_year(course['Section'])
+        return cls(
+            course['Course'],
+            course['Section'],
+            course['Location'],
+            days_to_mask(course['Days']),
+            time_to_minutes(course['Start']),
+            time_to_minutes(course['End']),
+            date_to_ordinal(course['StartDate'], year),
+            date_to_ordinal(course['EndDate'], year),
+            course['Status'],
+            course['Instructor'],
+            course['DeliveryMode'],
+        )
+
+    @classmethod
+    def from_row(cls, row) -> 'Course':
+        """Rebuild a Course from its JSON array form"""
+        return cls(*row)
+
+    @classmethod
+    def coerce(cls, value) -> 'Course':
+        """Accept a Course, its array form (e.g. back from the session) or a legacy dict"""
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, dict):
+            return cls.from_dict(value)
+        return cls(*value)
+
+
+# Legacy dict key -> (tuple index, formatter)
+_LEGACY_KEYS = {
+    "Course": (0, None),
+    "Section": (1, None),
+    "Location": (2, None),
+    "Days": (3, mask_to_days),
+    "Start": (4, minutes_to_time),
+    "End": (5, minutes_to_time),
+    "StartDate": (6, ordinal_to_date),
+    "EndDate": (7, ordinal_to_date),
+    "Status": (8, None),
+    "Instructor": (9, None),
+    "DeliveryMode": (10, None),
+}
+
+
+def number_slots(courses):
+    """Yield ``courses`` with ``slot_index`` set to each row's count of earlier rows in the same slot"""
+    seen = {}
+    for course in courses:
+        slot = course.code, course.section, course.days, course.start
+        index = seen[slot] = seen.get(slot, -1) + 1
+        yield course._replace(slot_index=index) if index != course.slot_index else course
+
+
+# --- Codecs ---
+def dumps_courses(courses) -> str:
+    """Encode courses as a compact JSON array of arrays"""
+    return json.dumps([tuple(c) for c in courses], separators=(',', ':'))
+
+def loads_courses(data):
+    return [Course.from_row(row) for row in json.loads(data)]
+
+
+# Binary form: version byte, string table, then fixed-size records referencing it
+_PACK_VERSION = 2
+_HEADER = struct.Struct('<BHH')
+_STRING_LEN = struct.Struct('<H')
+_RECORD = struct.Struct('<HHHBHHIIHHHB')
+_RECORDS = {1: struct.Struct('<HHHBHHIIHHH'), 2: _RECORD}  # version 1 predates slot_index
+
+def pack_courses(courses) -> bytes:
+    """Encode courses in a compact binary form; repeated strings are stored once"""
+    strings = {}
+    def ref(value):
+        return strings.setdefault(value, len(strings))
+    records = [
+        _RECORD.pack(ref(c.code), ref(c.section), ref(c.location), c.days, c.start, c.end,
+                     c.start_date, c.end_date, ref(c.status), ref(c.instructor), ref(c.delivery_mode), c.slot_index)
+        for c in courses
+    ]
+    parts = [_HEADER.pack(_PACK_VERSION, len(strings), len(records))]
+    for value in strings:
+        encoded = value.encode('utf-8')
+        parts.append(_STRING_LEN.pack(len(encoded)))
+        parts.append(encoded)
+    parts.extend(records)
+    return b''.join(parts)
+
+def unpack_courses(data: bytes):
+    version, string_count, record_count = _HEADER.unpack_from(data, 0)
+    record = _RECORDS.get(version)
+    if record is None:
+        raise ValueError(f'Unsupported packed course version {version}')
+    offset = _HEADER.size
+    strings = []
+    for _ in range(string_count):
+        (length,) = _STRING_LEN.unpack_from(data, offset)
+        offset += _STRING_LEN.size
+        strings.append(data[offset:offset + length].decode('utf-8'))
+        offset += length
+    courses = []
+    for _ in range(record_count):
+        (code, section, location, days, start, end, start_date, end_date,
+         status, instructor, delivery_mode, *slot_index) = record.unpack_from(data, offset)
+        offset += record.size
+        courses.append(Course(strings[code], strings[section], strings[location], days, start, end,
+                              start_date, end_date, strings[status], strings[instructor], strings[delivery_mode],
+                              *slot_index))
+    return courses
@@ -0,0 +1,301 @@
+"""
+Event Creation - concurrent, rate-limited calendar event inserts with retry and backoff
+One token bucket in Redis keeps every gunicorn worker under the project's Calendar API quota
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httplib2
+import redis
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.errors import HttpError
+
+from calendar_providers.base import split_outcomes
+
+logger = logging.getLogger(__name__)
+
+EVENT_CREATION_WORKERS = int(os.getenv('EVENT_CREATION_WORKERS', 4))
+EVENT_CREATION_MAX_RETRIES = int(os.getenv('EVENT_CREATION_MAX_RETRIES', 4))
+EVENT_CREATION_BACKOFF_BASE = float(os.getenv('EVENT_CREATION_BACKOFF_BASE', 0.5))  # seconds
+EVENT_CREATION_BACKOFF_CAP = float(os.getenv('EVENT_CREATION_BACKOFF_CAP', 16))  # seconds
+CALENDAR_API_RATE = float(os.getenv('CALENDAR_API_RATE', 10))  # requests/second across all workers
+CALENDAR_API_BURST = int(os.getenv('CALENDAR_API_BURST', 20))
+CALENDAR_API_TIMEOUT = float(os.getenv('CALENDAR_API_TIMEOUT', 30))  # seconds per HTTP request
+CALENDAR_API_QUOTA_WAIT = float(os.getenv('CALENDAR_API_QUOTA_WAIT', 60))  # seconds to wait for a token
+
+RETRIABLE_STATUSES = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+
+# Refill the bucket for the time elapsed since the last call, then take the requested tokens
+# or return how many milliseconds to wait. Uses the Redis clock so every host agrees.
+_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - ts) * rate / 1000)
+local wait = 0
+if tokens >= requested then
+    tokens = tokens - requested
+else
+    wait = math.ceil((requested - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+return wait
+"""
+
+
+class RateLimiter:
+    """Token bucket shared through Redis: ``rate`` requests/second with bursts up to ``burst``.
+
+    If Redis is unavailable the limiter fails open rather than blocking event creation.
+    """
+
+    def __init__(self, redis_client, rate: float = CALENDAR_API_RATE, burst: int = CALENDAR_API_BURST,
+                 key: str = 'ratelimit:calendar'):
+        self.redis = redis_client
+        self.rate = rate
+        self.burst = burst
+        self.key = key
+        self._script = redis_client.register_script(_TOKEN_BUCKET)
+
+    def acquire(self, tokens: int = 1, timeout: float = 60) -> bool:
+        """Block until ``tokens`` are available; returns False if ``timeout`` passed first"""
+        deadline = time.monotonic() + timeout
+        while tokens > 0:
+            chunk = min(tokens, self.burst)
+            try:
+                wait_ms = int(self._script(keys=[self.key], args=[self.rate, self.burst, chunk]))
+            except redis.RedisError as e:
+                logger.warning('Rate limiter unavailable, continuing without it: %s', e)
+                return True
+            if wait_ms == 0:
+                tokens -= chunk
+                continue
+            if time.monotonic() + wait_ms / 1000 > deadline:
+                return False
+            time.sleep(wait_ms / 1000)
+        return True
+
+
+class QuotaTimeout(Exception):
+    """Raised when the shared rate limiter grants no token in time; no request was sent."""
+
+
+def is_retriable(error: Exception) -> bool:
+    """429s, 5xx, per-user rate limit 403s and network errors are worth retrying"""
+    if isinstance(error, HttpError):
+        status = error.resp.status
+        return status in RETRIABLE_STATUSES or (status == 403 and any(r in str(error) for r in RATE_LIMIT_REASONS))
+    return isinstance(error, (OSError, httplib2.HttpLib2Error))
+
+
+def retry_after(error: Exception) -> float:
+    """Seconds requested by a Retry-After header, or 0"""
+    if isinstance(error, HttpError):
+        try:
+            return float(error.resp.get('retry-after', 0))
+        except (TypeError, ValueError):
+            return 0
+    return 0
+
+
+def describe(item) -> str:
+    """Course code of a course, or summary of an existing event, for log lines"""
+    return item.get('Course') or item.get('summary') or item.get('id', '?')
+
+
+class EventCreator:
+    """Creates calendar events through a bounded thread pool.
+
+    Every insert first takes a token from the shared RateLimiter; one that gets
+    none in time is not sent and fails with QuotaTimeout. Retriable
+    errors are retried up to ``max_retries`` times with full-jitter exponential
+    backoff (honouring Retry-After). Each thread gets its own AuthorizedHttp,
+    since httplib2 connections are not thread-safe. Latency, attempts and
+    failures are counted in a Redis hash shared by every worker.
+    """
+
+    METRICS_KEY = 'calendar:metrics'
+
+    def __init__(self, limiter: RateLimiter, workers: int = EVENT_CREATION_WORKERS,
+                 max_retries: int = EVENT_CREATION_MAX_RETRIES, backoff_base: float = EVENT_CREATION_BACKOFF_BASE,
+                 backoff_cap: float = EVENT_CREATION_BACKOFF_CAP):
+        self.limiter = limiter
+        self.redis = limiter.redis
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+    def _acquire(self, tokens: int = 1):
+        """Take ``tokens`` from the shared quota, waiting as long as they take to refill
+        plus CALENDAR_API_QUOTA_WAIT; raises QuotaTimeout rather than exceed it"""
+        if not self.limiter.acquire(tokens, timeout=CALENDAR_API_QUOTA_WAIT + tokens / self.limiter.rate):
+            raise QuotaTimeout(f'Calendar API quota exhausted; no capacity for {tokens} request(s)')
+
+    def create_events(self, provider, service, courses, credentials=None, on_result=None):
+        """Create events for ``courses``; returns (created, failed) like ``provider.create_events``.
+
+        Providers with a bulk path (Google batch requests) use it first and hand
+        the items that failed to the concurrent retrying inserts.
+        ``on_result(course, event, error)`` is called once per course as it finishes.
+        Raises QuotaTimeout, before anything is sent, if the quota stays exhausted.
+        """
+        return split_outcomes(self.create_each(provider, service, courses, credentials, on_result))
+
+    def create_each(self, provider, service, courses, credentials=None, on_result=None):
+        """``create_events``, but returning one (course, event, error) per course in course order"""
+        self._acquire(len(courses))
+        started = time.perf_counter()
+
+        def on_bulk_result(course, event, error):
+            # Settled by the bulk request itself; the fallback records its own inserts
+            self._record(course, 0, int((time.perf_counter() - started) * 1000), error)
+            if on_result is not None:
+                on_result(course, event, error)
+
+        return provider.create_each(
+            service, courses,
+            fallback=lambda remaining: self.run_concurrently(provider, service, remaining, credentials, on_result),
+            on_result=on_bulk_result)
+
+    def sync_events(self, provider, service, courses, credentials=None, on_result=None, schedule=None):
+        """Bring the calendar in line with ``courses`` using ``provider.plan_sync``.
+
+        Only new courses are inserted, changed ones patched, and events whose
+        course was dropped from ``schedule`` (the whole upload) deleted.
+        Returns (events, failed, deleted): every course's (course, event) with
+        unchanged ones flagged ``already_present`` and patched ones ``updated``,
+        the failures, and the number of deletions. Outcomes are matched to
+        courses by position, so repeated or equal courses each get their own.
+        """
+        self._acquire()
+        plan = provider.plan_sync(service, courses, schedule)
+        outcomes = {}
+        for i, event in plan.unchanged:
+            outcomes[i] = (event, None)
+            if on_result is not None:
+                on_result(courses[i], event, None)
+
+        def on_insert(course, event, error):
+            # 409: the event predates fingerprints (or the listing); it is patched below instead
+            if on_result is not None and not (error is None and event.get('already_present')):
+                on_result(course, event, error)
+
+        inserted = self.create_each(provider, service, [courses[i] for i in plan.insert], credentials, on_insert)
+        outcomes.update((i, (event, error)) for i, (_, event, error) in zip(plan.insert, inserted))
+        stale = [i for i in plan.insert if outcomes[i][1] is None and outcomes[i][0].get('already_present')]
+        patch = plan.update + stale
+        updated = self.run_concurrently(provider, service, [courses[i] for i in patch], credentials, on_result,
+                                        call=provider.update_event, metric='updates')
+        outcomes.update((i, (event, error)) for i, (_, event, error) in zip(patch, updated))
+        deleted, delete_failed = self.insert_concurrently(
+            provider, service, plan.delete, credentials, call=provider.delete_event, metric='deletes')
+        for event, error in delete_failed:
+            logger.warning('Could not delete event %s (%s); the next sync retries it', event['id'], error)
+
+        events, failed = split_outcomes((courses[i], *outcomes[i]) for i in sorted(outcomes))
+        return events, failed, len(deleted)
+
+    def insert_concurrently(self, provider, service, courses, credentials=None, on_result=None,
+                            call=None, metric='inserts'):
+        """Insert each course as its own request in the thread pool; returns (created, failed) in course order.
+
+        ``call(service, item, http=...)`` replaces ``provider.create_event`` for other
+        per-item requests (patches, deletes), counted under ``metric``.
+        """
+        return split_outcomes(self.run_concurrently(provider, service, courses, credentials, on_result, call, metric))
+
+    def run_concurrently(self, provider, service, courses, credentials=None, on_result=None,
+                         call=None, metric='inserts'):
+        """``insert_concurrently``, but returning one (course, event, error) per course in course order"""
+        if not courses:
+            return []
+        call = call or provider.create_event
+        local = threading.local()
+
+        def thread_http():
+            if credentials is None:
+                return None
+            if not hasattr(local, 'http'):
+                local.http = AuthorizedHttp(credentials, http=httplib2.Http(timeout=CALENDAR_API_TIMEOUT))
+            return local.http
+
+        # Without credentials every thread would share the service's single connection
+        workers = min(self.workers if credentials is not None else 1, len(courses))
+        # Set once a request is refused a token, so the rest fail fast instead of each waiting it out
+        starved = threading.Event()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='calendar') as pool:
+            return list(pool.map(
+                lambda course: self._insert_with_retry(call, service, course, thread_http, on_result, metric, starved),
+                courses))
+
+    def _insert_with_retry(self, call, service, course, thread_http, on_result=None, metric='inserts',
+                           starved=None):
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                if starved is not None and starved.is_set():
+                    raise QuotaTimeout('Calendar API quota exhausted; request not sent')
+                self._acquire()
+                event = call(service, course, http=thread_http())
+                error = None
+            except QuotaTimeout as e:
+                if starved is not None:
+                    starved.set()
+                event, error = None, e
+            except Exception as e:
+                event, error = None, e
+            if error is None or attempt >= self.max_retries or not is_retriable(error):
+                break
+            delay = max(random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt)), retry_after(error))
+            attempt += 1
+            logger.info('Retrying %s in %.2fs (attempt %d): %s', describe(course), delay, attempt + 1, error)
+            time.sleep(delay)
+        latency_ms = int((time.perf_counter() - started) * 1000)
+        self._record(course, attempt, latency_ms, error, metric)
+        if on_result is not None:
+            on_result(course, event, error)
+        return course, event, error
+
+    def _record(self, course, retries, latency_ms, error, metric='inserts'):
+        logger.info('Event for %s: %s %s after %d ms (%d retries)', describe(course), metric,
+                    'failed' if error else 'done', latency_ms, retries)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hincrby(self.METRICS_KEY, metric, 1)
+            pipe.hincrby(self.METRICS_KEY, 'retries', retries)
+            pipe.hincrby(self.METRICS_KEY, 'latency_ms', latency_ms)
+            if error is not None:
+                pipe.hincrby(self.METRICS_KEY, 'failures', 1)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning('Could not record event creation metrics: %s', e)
+
+    def stats(self) -> dict:
+        """Return insert, update, delete, retry and failure counts and mean latency"""
+        raw = {key: int(value) for key, value in self.redis.hgetall(self.METRICS_KEY).items()}
+        inserts = raw.get('inserts', 0)
+        requests = inserts + raw.get('updates', 0) + raw.get('deletes', 0)
+        return {
+            'inserts': inserts,
+            'updates': raw.get('updates', 0),
+            'deletes': raw.get('deletes', 0),
+            'retries': raw.get('retries', 0),
+            'failures': raw.get('failures', 0),
+            'mean_latency_ms': round(raw.get('latency_ms', 0) / requests, 1) if requests else 0,
+            'rate_limit_per_second': self.limiter.rate,
+            'workers': self.workers,
+        }
@@ -0,0 +1,221 @@
+"""
+Event Jobs - Redis-backed queue of calendar event-creation jobs
+The web app enqueues a job after OAuth and returns at once; worker.py creates the events
+and records progress that the /jobs endpoints report back to the browser
+"""
+
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+
+from course import dumps_courses, loads_courses
+
+logger = logging.getLogger(__name__)
+
+JOB_TTL = int(os.getenv('EVENT_JOB_TTL', 86400))  # job status/results kept for a day
+JOB_PAYLOAD_TTL = int(os.getenv('EVENT_JOB_PAYLOAD_TTL', 3600))  # unclaimed credentials expire after an hour
+JOB_LEASE = int(os.getenv('EVENT_JOB_LEASE', 60))  # seconds a claimed job survives without a heartbeat
+JOB_MAX_ATTEMPTS = int(os.getenv('EVENT_JOB_MAX_ATTEMPTS', 3))  # claims before a job whose worker died is failed
+
+
+class JobQueue:
+    """FIFO of event-creation jobs in Redis.
+
+    ``job:<id>`` is a hash with status (queued, running, done, failed), mode
+    (create, or sync to diff against existing events), total, created,
+    present (already in the calendar), updated, deleted and failed counts, and
+    on completion the created or found events as (id, summary) pairs. The OAuth credentials and courses live in a separate
+    short-lived payload key, deleted as soon as the job finishes.
+
+    Claiming moves a job onto a processing list and gives it a lease that the
+    worker's heartbeat keeps extending. If the worker dies or is redeployed
+    mid-job, ``requeue_stale`` puts the job back on the queue (re-running it is
+    safe: event ids are deterministic) or, after ``JOB_MAX_ATTEMPTS`` claims,
+    fails it so the progress page finishes.
+    """
+
+    QUEUE_KEY = 'jobs:calendar'
+    PROCESSING_KEY = 'jobs:calendar:processing'
+    LEASES_KEY = 'jobs:calendar:leases'  # zset of claimed job id -> lease expiry (epoch seconds)
+    COUNT_FIELDS = ('created', 'present', 'updated', 'deleted', 'failed')
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+
+    def _key(self, job_id: str) -> str:
+        return f"job:{job_id}"
+
+    def _payload_key(self, job_id: str) -> str:
+        return f"job:{job_id}:payload"
+
+    def enqueue(self, provider: str, credentials_json: str, courses, upload_id=None, mode: str = 'create',
+                schedule=None, upload_digest=None) -> str:
+        """Queue a job creating (or, with mode 'sync', resyncing) events for ``courses``; returns its id.
+
+        A sync also needs ``schedule``, every course of the upload, to tell dropped
+        courses from unselected ones; ``upload_digest`` is stamped on the events.
+        """
+        job_id = secrets.token_urlsafe(12)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.set(self._payload_key(job_id), json.dumps({
+            'provider': provider,
+            'credentials': credentials_json,
+            'mode': mode,
+            'courses': dumps_courses(courses),
+            'schedule': dumps_courses(schedule) if schedule is not None else None,
+            'upload_digest': upload_digest,
+        }), ex=JOB_PAYLOAD_TTL)
+        pipe.hset(self._key(job_id), mapping={
+            'status': 'queued',
+            'provider': provider,
+            'mode': mode,
+            'upload_id': upload_id or '',
+            'total': len(courses),
+            'created': 0,
+            'present': 0,
+            'updated': 0,
+            'deleted': 0,
+            'failed': 0,
+            'queued_at': time.time(),
+        })
+        pipe.expire(self._key(job_id), JOB_TTL)
+        pipe.rpush(self.QUEUE_KEY, job_id)
+        pipe.execute()
+        logger.info('Queued event job %s (%d courses)', job_id, len(courses))
+        return job_id
+
+    def claim(self, timeout: int = 5):
+        """Block up to ``timeout`` seconds for the next job; returns (job_id, payload) or None.
+
+        The job stays on the processing list, with its payload, until ``finish``.
+        """
+        job_id = self.redis.blmove(self.QUEUE_KEY, self.PROCESSING_KEY, timeout, 'LEFT', 'RIGHT')
+        if job_id is None:
+            return None
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.get(self._payload_key(job_id))
+        pipe.expire(self._payload_key(job_id), JOB_PAYLOAD_TTL)
+        pipe.zadd(self.LEASES_KEY, {job_id: time.time() + JOB_LEASE})
+        pipe.hset(self._key(job_id), mapping={'status': 'running', 'started_at': time.time()})
+        pipe.hincrby(self._key(job_id), 'attempts', 1)
+        raw = pipe.execute()[0]
+        if raw is None:
+            self.finish(job_id, error='Job expired before a worker picked it up')
+            return None
+        payload = json.loads(raw)
+        payload['courses'] = loads_courses(payload['courses'])
+        if payload.get('schedule') is not None:
+            payload['schedule'] = loads_courses(payload['schedule'])
+        return job_id, payload
+
+    def heartbeat(self, job_id: str):
+        """Extend a running job's lease (and keep its payload alive)"""
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zadd(self.LEASES_KEY, {job_id: time.time() + JOB_LEASE}, xx=True)
+        pipe.expire(self._payload_key(job_id), JOB_PAYLOAD_TTL)
+        pipe.execute()
+
+    @contextmanager
+    def keep_alive(self, job_id: str):
+        """Heartbeat ``job_id`` from a background thread for the duration of the block"""
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(JOB_LEASE / 3):
+                try:
+                    self.heartbeat(job_id)
+                except Exception as e:
+                    logger.warning('Heartbeat for job %s failed: %s', job_id, e)
+
+        thread = threading.Thread(target=beat, name=f'job-heartbeat-{job_id[:6]}', daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def requeue_stale(self) -> int:
+        """Requeue (or, past JOB_MAX_ATTEMPTS, fail) claimed jobs whose lease ran out; returns how many"""
+        now = time.time()
+        # A worker that died between BLMOVE and taking its lease left a job with none: start one now
+        for job_id in self.redis.lrange(self.PROCESSING_KEY, 0, -1):
+            self.redis.zadd(self.LEASES_KEY, {job_id: now + JOB_LEASE}, nx=True)
+        handled = 0
+        for job_id in self.redis.zrangebyscore(self.LEASES_KEY, '-inf', now):
+            if not self.redis.zrem(self.LEASES_KEY, job_id):
+                continue  # another sweeper took it
+            handled += 1
+            attempts = int(self.redis.hget(self._key(job_id), 'attempts') or 0)
+            if attempts >= JOB_MAX_ATTEMPTS or not self.redis.exists(self._payload_key(job_id)):
+                logger.warning('Job %s lost its worker %d time(s); giving up', job_id, attempts)
+                self.finish(job_id, error='The calendar worker stopped while creating your events. Please try again.')
+                continue
+            logger.warning('Job %s lost its worker; requeueing (attempt %d)', job_id, attempts + 1)
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.lrem(self.PROCESSING_KEY, 1, job_id)
+            pipe.hset(self._key(job_id), mapping=dict(dict.fromkeys(self.COUNT_FIELDS, 0), status='queued'))
+            pipe.rpush(self.QUEUE_KEY, job_id)
+            pipe.execute()
+        return handled
+
+    def record(self, job_id: str, outcome: str):
+        """Count one finished course as 'created', 'present', 'updated' or 'failed'"""
+        self.redis.hincrby(self._key(job_id), outcome, 1)
+
+    def finish(self, job_id: str, events=(), failures=(), calendar_email=None, error=None, counts=None):
+        """Mark a job done (or failed with ``error``) and store its results.
+
+        ``events`` holds every event now in the calendar; ``counts`` splits them
+        into created, present and updated, plus the number deleted.
+        """
+        events, failures = list(events), list(failures)
+        fields = {
+            'status': 'failed' if error else 'done',
+            'finished_at': time.time(),
+            'events': json.dumps(events),
+            'failures': json.dumps(failures),
+            'calendar_email': calendar_email or '',
+            'error': error or '',
+        }
+        if not error:
+            # Counts may have been bumped from several threads; settle them to the final totals
+            fields.update(counts or {'created': len(events)}, failed=len(failures))
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hset(self._key(job_id), mapping=fields)
+        pipe.expire(self._key(job_id), JOB_TTL)
+        pipe.delete(self._payload_key(job_id))
+        pipe.lrem(self.PROCESSING_KEY, 1, job_id)
+        pipe.zrem(self.LEASES_KEY, job_id)
+        pipe.execute()
+
+    def status(self, job_id: str):
+        """Return a job's progress and, once finished, its results; None if unknown"""
+        raw = self.redis.hgetall(self._key(job_id))
+        if not raw:
+            return None
+        status = {
+            'job_id': job_id,
+            'status': raw.get('status'),
+            'provider': raw.get('provider'),
+            'mode': raw.get('mode', 'create'),
+            'total': int(raw.get('total', 0)),
+            'created': int(raw.get('created', 0)),
+            'present': int(raw.get('present', 0)),
+            'updated': int(raw.get('updated', 0)),
+            'deleted': int(raw.get('deleted', 0)),
+            'failed': int(raw.get('failed', 0)),
+        }
+        if status['status'] in ('done', 'failed'):
+            status['events'] = json.loads(raw.get('events') or '[]')
+            status['failures'] = json.loads(raw.get('failures') or '[]')
+            status['calendar_email'] = raw.get('calendar_email') or None
+            status['error'] = raw.get('error') or None
+        return status
+
+    def queue_length(self) -> int:
+        return self.redis.llen(self.QUEUE_KEY)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Fake Calendar Server - minimal stand-in for the Google Calendar events API
+Serves inserts and gets (single and the multipart batch endpoint), list, patch and delete so worker.py
+can create and resync events end to end without a Google account. Optional latency and
+failure injection exercise retries. Deleted events are kept as cancelled, as Google does.
+
+Usage:
+  python fake_calendar_server.py --port 8085 --latency-ms 150 --failure-rate 0.2
+  GOOGLE_CALENDAR_API_ROOT=http://localhost:8085/ python worker.py
+"""
+
+import argparse
+import json
+import random
+import secrets
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+
+from flask import Flask, Response, request
+
+app = Flask(__name__)
+settings = {'latency_ms': 0, 'failure_rate': 0.0, 'email': 'student@example.com'}
+events = {}
+REASONS = {200: 'OK', 404: 'Not Found', 409: 'Conflict', 503: 'Service Unavailable'}
+lock = threading.Lock()
+
+
+def insert_event(calendar_id, body):
+    """Return (status, response dict) for one events.insert call"""
+    time.sleep(settings['latency_ms'] / 1000)
+    if random.random() < settings['failure_rate']:
+        return 503, {'error': {'code': 503, 'message': 'Backend Error', 'errors': [{'reason': 'backendError'}]}}
+    event = dict(body, status='confirmed', kind='calendar#event',
+                 organizer={'email': settings['email'], 'self': True},
+                 htmlLink=f"http://localhost/fake-calendar/{calendar_id}")
+    event.setdefault('id', secrets.token_hex(13))
+    with lock:
+        if event['id'] in events:
+            return 409, {'error': {'code': 409, 'message': 'The requested identifier already exists.',
+                                   'errors': [{'reason': 'duplicate'}]}}
+        events[event['id']] = event
+    return 200, event
+
+
+@app.route('/calendar/v3/calendars/<calendar_id>/events', methods=['POST'])
+def insert(calendar_id):
+    status, body = insert_event(calendar_id, request.get_json())
+    return Response(json.dumps(body), status=status, mimetype='application/json')
+
+
+@app.route('/calendar/v3/calendars/<calendar_id>/events', methods=['GET'])
+def list_calendar_events(calendar_id):
+    """events.list with the privateExtendedProperty and showDeleted filters"""
+    wanted = dict(p.split('=', 1) for p in request.args.getlist('privateExtendedProperty'))
+    show_deleted = request.args.get('showDeleted') == 'true'
+    with lock:
+        items = [event for event in events.values()
+                 if (show_deleted or event['status'] != 'cancelled')
+                 and all(event.get('extendedProperties', {}).get('private', {}).get(k) == v
+                         for k, v in wanted.items())]
+    return Response(json.dumps({'kind': 'calendar#events', 'items': items}), mimetype='application/json')
+
+
+def get_event(event_id):
+    """Return (status, response dict) for one events.get call; deleted events are still returned"""
+    with lock:
+        event = events.get(event_id)
+    if event is None:
+        return 404, {'error': {'code': 404, 'message': 'Not Found'}}
+    return 200, event
+
+
+@app.route('/calendar/v3/calendars/<calendar_id>/events/<event_id>', methods=['GET', 'PATCH', 'DELETE'])
+def change(calendar_id, event_id):
+    time.sleep(settings['latency_ms'] / 1000)
+    if request.method == 'GET':
+        status, body = get_event(event_id)
+        return Response(json.dumps(body), status=status, mimetype='application/json')
+    with lock:
+        event = events.get(event_id)
+        if event is None or (request.method == 'DELETE' and event['status'] == 'cancelled'):
+            return Response(json.dumps({'error': {'code': 404, 'message': 'Not Found'}}), status=404,
+                            mimetype='application/json')
+        if request.method == 'DELETE':
+            event['status'] = 'cancelled'
+            return Response(status=204)
+        event.update(request.get_json())
+        return Response(json.dumps(event), mimetype='application/json')
+
+
+@app.route('/batch/calendar/v3', methods=['POST'])
+def batch():
+    """Answer a multipart/mixed batch with one application/http response part per request part"""
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {request.content_type}\r\n\r\n".encode() + request.get_data())
+    boundary = f"batch_{secrets.token_hex(8)}"
+    parts = []
+    for part in message.iter_parts():
+        # The client library separates headers and body with bare LFs
+        head, _, body = part.get_payload(decode=True).replace(b'\r\n', b'\n').partition(b'\n\n')
+        request_line = head.split(b'\n', 1)[0].decode()
+        method, target = request_line.split()[:2]
+        path = target.split('?')[0]
+        calendar_id = path.split('/calendars/')[1].split('/')[0]
+        event_id = path.split('/events', 1)[1].strip('/')
+        if method == 'GET':
+            status, response = get_event(event_id)
+        else:
+            status, response = insert_event(calendar_id, json.loads(body or b'{}'))
+        content_id = part['Content-ID'].strip('<>')
+        parts.append(
+            f"--{boundary}\r\n"
+            f"Content-Type: application/http\r\n"
+            f"Content-ID: <response-{content_id}>\r\n\r\n"
+            f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\n"
+            f"Content-Type: application/json; charset=UTF-8\r\n\r\n"
+            f"{json.dumps(response)}\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n")
+    return Response(''.join(parts), mimetype=f'multipart/mixed; boundary={boundary}')
+
+
+@app.route('/events')
+def list_events():
+    """Everything created so far, deleted events included (not part of the real API; handy when testing)"""
+    with lock:
+        return Response(json.dumps(list(events.values()), indent=2), mimetype='application/json')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake Google Calendar API for local worker runs')
+    parser.add_argument('--port', type=int, default=8085)
+    parser.add_argument('--latency-ms', type=int, default=0, help='Delay added to every insert')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of inserts answered with 503')
+    args = parser.parse_args()
+    settings.update(latency_ms=args.latency_ms, failure_rate=args.failure_rate)
+    app.run(host='0.0.0.0', port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
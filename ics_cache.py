@@ -0,0 +1,87 @@
+"""
+ICS Cache - generated .ics documents keyed by (upload content hash, selection, parser and generator versions)
+Repeat downloads of the same selection are served from Redis, or answered 304, instead of rebuilt
+"""
+
+import hashlib
+import logging
+import os
+
+import redis
+
+from ics_export import ICS_GENERATOR_VERSION
+from pdf_parser import PARSER_ENGINE, PARSER_VERSION, PDF_EXTRACT_MODE
+
+logger = logging.getLogger(__name__)
+
+ICS_CACHE_TTL = int(os.getenv('ICS_CACHE_TTL', 86400))  # a day
+
+
+def ics_etag(digest: str, selection: str) -> str:
+    """Strong ETag (and cache key) of the .ics built from upload ``digest`` with ``selection``.
+
+    The document is a pure function of these inputs plus how the upload was parsed
+    (the same version, engine and mode parse_cache keys on), so equal tags mean equal bytes.
+    """
+    key = f"v{ICS_GENERATOR_VERSION}:p{PARSER_VERSION}-{PARSER_ENGINE}-{PDF_EXTRACT_MODE}:{digest}:{selection}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+
+class IcsCache:
+    """Redis-backed cache of .ics documents by ETag, each kept for ``ttl`` seconds.
+
+    Hit, miss and 304 counters live in a Redis hash shared by every worker.
+    """
+
+    PREFIX = 'ics'
+
+    def __init__(self, redis_client, ttl: int = ICS_CACHE_TTL):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.stats_key = f"{self.PREFIX}:stats"
+
+    def _key(self, etag: str) -> str:
+        return f"{self.PREFIX}:{etag}"
+
+    def get(self, etag: str):
+        """Return the cached document bytes, or None on a miss"""
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.get(self._key(etag))
+            pipe.expire(self._key(etag), self.ttl)
+            raw = pipe.execute()[0]
+            self.redis.hincrby(self.stats_key, 'hits' if raw else 'misses', 1)
+        except redis.RedisError as e:
+            logger.warning('ICS cache lookup failed for %s: %s', etag, e)
+            return None
+        if raw is None:
+            return None
+        return raw.encode('utf-8') if isinstance(raw, str) else raw
+
+    def put(self, etag: str, data: bytes):
+        try:
+            self.redis.set(self._key(etag), data, ex=self.ttl)
+        except redis.RedisError as e:
+            logger.warning('ICS cache store failed for %s: %s', etag, e)
+
+    def not_modified(self):
+        """Count a download answered 304 from the client's copy"""
+        try:
+            self.redis.hincrby(self.stats_key, 'not_modified', 1)
+        except redis.RedisError as e:
+            logger.warning('Could not record ICS cache stats: %s', e)
+
+    def stats(self) -> dict:
+        """Return hit/miss/304 counters and hit rate"""
+        raw = self.redis.hgetall(self.stats_key)
+        hits = int(raw.get('hits', 0))
+        misses = int(raw.get('misses', 0))
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'not_modified': int(raw.get('not_modified', 0)),
+            'hit_rate': round(hits / lookups * 100, 1) if lookups else 0,
+            'generator_version': ICS_GENERATOR_VERSION,
+            'ttl_seconds': self.ttl,
+        }
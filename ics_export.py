@@ -0,0 +1,129 @@
+"""
+ICS Export - builds iCalendar files from parsed courses
+Shared by the /download-ics route and the bulk import CLI so their output matches.
+iter_ics streams the document straight from the normalised courses; build_calendar is the
+equivalent icalendar object model, kept as the reference the streamed output is checked against.
+"""
+
+import logging
+from datetime import datetime, time
+
+from icalendar import Calendar as ICalendar
+from icalendar import Event as ICalendarEvent
+
+from course import Course
+from occurrence import occurrence
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the generated document changes, so cached downloads (ics_cache) are rebuilt
+ICS_GENERATOR_VERSION = 2
+CALENDAR_HEADER = b"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//SchedShare//EN\r\n"
+CALENDAR_FOOTER = b"END:VCALENDAR\r\n"
+MAX_LINE_OCTETS = 75  # RFC 5545 3.1, excluding the CRLF
+
+
+def campus_address(location: str) -> str:
+    """Full campus address for a schedule location, or the location itself"""
+    if 'Nanaimo' in location:
+        return "Vancouver Island University, 900 Fifth St, Nanaimo, BC V9R 5S5, Canada"
+    if 'Cowichan' in location:
+        return "Vancouver Island University, Cowichan Campus, 2011 University Way, North Cowichan, BC V9L 0C7, Canada"
+    return location
+
+
+def build_calendar(courses) -> ICalendar:
+    """Return an icalendar Calendar with one weekly-recurring VEVENT per course"""
+    cal = ICalendar()
+    cal.add('prodid', '-//SchedShare//EN')
+    cal.add('version', '2.0')
+
+    for c in courses:
+        try:
+            e = ICalendarEvent()
+            # Same UID on every export (derived from the Google event id) so re-imports update in place
+            e.add('uid', Course.coerce(c).ical_uid)
+            e.add('summary', f"{c.get('Course', 'N/A')} ({c.get('Section', 'N/A')})")
+            # Set location to full campus address
+            e.add('location', campus_address(c.get('Location', 'N/A')))
+            e.add('description', f"Instructor: {c.get('Instructor', 'N/A')}, Status: {c.get('Status', 'N/A')}, Mode: {c.get('DeliveryMode', 'N/A')}")
+            
+            # First meeting day, not the term start date: DTSTART always counts as an occurrence
+            spec = occurrence(c)
+            e.add('dtstart', spec.start)
+            e.add('dtend', spec.end)
+            
+            if spec.weekdays:
+                e.add('rrule', {'freq': 'weekly', 'byday': list(spec.weekdays),
+                                'until': datetime.combine(spec.until, time())})
+            
+            cal.add_component(e)
+        except Exception as ex:
+            logger.warning(f"Could not create .ics event for course {c.get('Course')}. Error: {ex}")
+            continue
+
+    return cal
+
+def iter_ics(courses, header: bytes = CALENDAR_HEADER):
+    """Yield the .ics document for ``courses`` one VEVENT at a time, without building icalendar objects"""
+    yield header
+    for c in courses:
+        try:
+            yield _vevent(Course.coerce(c))
+        except Exception as ex:
+            logger.warning(f"Could not create .ics event for course {c.get('Course')}. Error: {ex}")
+    yield CALENDAR_FOOTER
+
+def build_ics(courses) -> bytes:
+    """Return the serialized .ics document for ``courses``"""
+    return b''.join(iter_ics(courses))
+
+def _vevent(course: Course) -> bytes:
+    spec = occurrence(course)
+    lines = [
+        b"BEGIN:VEVENT\r\n",
+        _content_line('UID', course.ical_uid),
+        _content_line('SUMMARY', escape_text(f"{course.code} ({course.section})")),
+        _content_line('DTSTART', _format_datetime(spec.start)),
+        _content_line('DTEND', _format_datetime(spec.end)),
+    ]
+    if spec.weekdays:
+        # Floating UNTIL, like DTSTART
+        lines.append(_content_line('RRULE', f"FREQ=WEEKLY;UNTIL={_format_date(spec.until)}T000000;BYDAY={spec.byday}"))
+    lines.append(_content_line('DESCRIPTION', escape_text(
+        f"Instructor: {course.instructor}, Status: {course.status}, Mode: {course.delivery_mode}")))
+    lines.append(_content_line('LOCATION', escape_text(campus_address(course.location))))
+    lines.append(b"END:VEVENT\r\n")
+    return b''.join(lines)
+
+def escape_text(value: str) -> str:
+    """Escape a TEXT value (RFC 5545 3.3.11)"""
+    return (value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n').replace('\r', '\\n'))
+
+def _content_line(name: str, value: str) -> bytes:
+    """``NAME:value`` as UTF-8, folded so no physical line exceeds 75 octets"""
+    line = f"{name}:{value}".encode('utf-8')
+    if len(line) <= MAX_LINE_OCTETS:
+        return line + b"\r\n"
+    parts = []
+    start, limit = 0, MAX_LINE_OCTETS
+    while len(line) - start > limit:
+        end = start + limit
+        # Never split a UTF-8 sequence, and keep backslash escapes on one line for older clients
+        while line[end] & 0xC0 == 0x80:
+            end -= 1
+        backslashes = 0  # the whole run, which may start on an earlier line (NAME: stops it)
+        while line[end - 1 - backslashes] == 0x5C:
+            backslashes += 1
+        end -= backslashes % 2
+        parts.append(line[start:end])
+        start, limit = end, MAX_LINE_OCTETS - 1  # continuation lines start with a space
+    parts.append(line[start:])
+    return b"\r\n ".join(parts) + b"\r\n"
+
+def _format_date(value) -> str:
+    return f"{value.year:04d}{value.month:02d}{value.day:02d}"
+
+def _format_datetime(value: datetime) -> str:
+    return f"{_format_date(value)}T{value.hour:02d}{value.minute:02d}{value.second:02d}"
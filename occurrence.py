@@ -0,0 +1,71 @@
+"""
+Occurrence - normalises a course row into its weekly recurrence
+The Google provider and the ICS export read first start/end, weekdays and UNTIL from one
+OccurrenceSpec instead of each re-parsing '%d-%b' dates with strptime for every event.
+"""
+
+from datetime import date, datetime, time
+from functools import lru_cache
+from typing import NamedTuple, Tuple
+
+from course import Course
+
+TIMEZONE = 'America/Vancouver'
+RRULE_DAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+# _FIRST_DAY_OFFSET[mask][weekday]: days from ``weekday`` to the next day in ``mask`` (0 if it is one)
+_FIRST_DAY_OFFSET = [
+    [next((i for i in range(7) if mask >> (weekday + i) % 7 & 1), 0) for weekday in range(7)]
+    for mask in range(128)
+]
+_BYDAY = [tuple(code for i, code in enumerate(RRULE_DAYS) if mask >> i & 1) for mask in range(128)]
+
+
+class OccurrenceSpec(NamedTuple):
+    """When a course meets: from ``start``-``end`` on its first day, weekly on ``weekdays`` until ``until``.
+
+    Datetimes are naive local times in ``timezone``.
+    """
+    start: datetime
+    end: datetime
+    weekdays: Tuple[str, ...]
+    until: date
+    timezone: str = TIMEZONE
+
+    @property
+    def byday(self) -> str:
+        """RRULE BYDAY value, e.g. 'MO,WE'"""
+        return ','.join(self.weekdays)
+
+    @property
+    def until_utc(self) -> str:
+        """RRULE UNTIL value as Google receives it, e.g. '20241206T000000Z'"""
+        return f"{self.until.year:04d}{self.until.month:02d}{self.until.day:02d}T000000Z"
+
+
+@lru_cache(maxsize=1024)
+def first_meeting(start_date: int, days: int) -> date:
+    """First date on or after ``start_date`` (an ordinal) that falls on a day in the ``days`` mask"""
+    weekday = (start_date - 1) % 7  # ordinal 1 (0001-01-01) is a Monday
+    return date.fromordinal(start_date + _FIRST_DAY_OFFSET[days][weekday])
+
+
+@lru_cache(maxsize=1024)
+def _date(ordinal: int) -> date:
+    return date.fromordinal(ordinal)
+
+
+@lru_cache(maxsize=4096)
+def _occurrence(course: Course) -> OccurrenceSpec:
+    day = first_meeting(course.start_date, course.days)
+    return OccurrenceSpec(
+        start=datetime.combine(day, time(course.start // 60, course.start % 60)),
+        end=datetime.combine(day, time(course.end // 60, course.end % 60)),
+        weekdays=_BYDAY[course.days],
+        until=_date(course.end_date),
+    )
+
+
+def occurrence(course) -> OccurrenceSpec:
+    """OccurrenceSpec of a Course (or legacy course dict), memoised per course row"""
+    return _occurrence(Course.coerce(course))
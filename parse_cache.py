@@ -0,0 +1,110 @@
+"""
+Parse Cache - content-addressed cache of parsed schedule PDFs
+Repeat uploads of byte-identical PDFs are served from Redis without running pdfplumber
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+
+import redis
+
+from course import Course
+from pdf_parser import PARSER_ENGINE, PARSER_VERSION, PDF_EXTRACT_MODE
+
+logger = logging.getLogger(__name__)
+
+PARSE_CACHE_TTL = int(os.getenv('PARSE_CACHE_TTL', 86400 * 14))  # 14 days
+PARSE_CACHE_MAX_ENTRIES = int(os.getenv('PARSE_CACHE_MAX_ENTRIES', 5000))
+
+
+def content_hash(data: bytes) -> str:
+    """Return the SHA-256 hex digest of an uploaded file's bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ParseCache:
+    """Redis-backed cache of parse results keyed by (parser version/engine/mode, SHA-256 of the PDF).
+
+    Every entry expires after ``ttl`` seconds. On top of that, a sorted set of
+    last-access times keeps at most ``max_entries`` results, evicting the least
+    recently used ones first. Hit/miss counters live in a Redis hash so they are
+    shared by every worker.
+    """
+
+    PREFIX = 'parse'
+
+    def __init__(self, redis_client, ttl: int = PARSE_CACHE_TTL, max_entries: int = PARSE_CACHE_MAX_ENTRIES):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lru_key = f"{self.PREFIX}:lru"
+        self.stats_key = f"{self.PREFIX}:stats"
+
+    def _key(self, digest: str) -> str:
+        return f"{self.PREFIX}:v{PARSER_VERSION}-{PARSER_ENGINE}-{PDF_EXTRACT_MODE}:{digest}"
+
+    def get(self, digest: str):
+        """Return the cached course list for ``digest``, or None on a miss"""
+        key = self._key(digest)
+        try:
+            raw = self.redis.get(key)
+            if not raw:
+                self.redis.hincrby(self.stats_key, 'misses', 1)
+                return None
+            entry = json.loads(raw)
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.expire(key, self.ttl)
+            pipe.zadd(self.lru_key, {key: time.time()})
+            pipe.hincrby(self.stats_key, 'hits', 1)
+            pipe.hincrby(self.stats_key, 'saved_ms', entry.get('parse_ms', 0))
+            pipe.execute()
+            return [Course.from_row(row) for row in entry['courses']]
+        except (redis.RedisError, ValueError, KeyError) as e:
+            logger.warning('Parse cache lookup failed for %s: %s', digest, e)
+            return None
+
+    def put(self, digest: str, courses, parse_ms: int = 0):
+        """Store a parse result (Course records, stored as JSON arrays) and evict
+        the least recently used entries over the limit"""
+        key = self._key(digest)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.set(key, json.dumps({'courses': [tuple(c) for c in courses], 'parse_ms': parse_ms}, separators=(',', ':')), ex=self.ttl)
+            pipe.zadd(self.lru_key, {key: time.time()})
+            pipe.zcard(self.lru_key)
+            size = pipe.execute()[-1]
+            if size > self.max_entries:
+                self._evict(size - self.max_entries)
+        except redis.RedisError as e:
+            logger.warning('Parse cache store failed for %s: %s', digest, e)
+
+    def _evict(self, count: int):
+        oldest = self.redis.zpopmin(self.lru_key, count)
+        keys = [key for key, _ in oldest]
+        if keys:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.delete(*keys)
+            pipe.hincrby(self.stats_key, 'evictions', len(keys))
+            pipe.execute()
+            logger.info('Parse cache evicted %d entries', len(keys))
+
+    def stats(self) -> dict:
+        """Return hit/miss counters, hit rate and parse time saved"""
+        raw = self.redis.hgetall(self.stats_key)
+        hits = int(raw.get('hits', 0))
+        misses = int(raw.get('misses', 0))
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'evictions': int(raw.get('evictions', 0)),
+            'hit_rate': round(hits / lookups * 100, 1) if lookups else 0,
+            'saved_seconds': round(int(raw.get('saved_ms', 0)) / 1000, 1),
+            'entries': self.redis.zcard(self.lru_key),
+            'parser_version': PARSER_VERSION,
+            'parser_engine': PARSER_ENGINE,
+            'extract_mode': PDF_EXTRACT_MODE,
+        }
@@ -0,0 +1,152 @@
+"""
+Parse Executor - runs PDF parsing in a bounded set of worker processes
+Keeps CPU-bound pdfplumber work off the request threads and out of the GIL
+"""
+
+import atexit
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from pdf_parser import parse_pdf
+
+logger = logging.getLogger(__name__)
+
+PARSE_WORKERS = int(os.getenv('PARSE_WORKERS', 2))
+PARSE_TIMEOUT = float(os.getenv('PARSE_TIMEOUT', 30))
+PARSE_MAX_PENDING = int(os.getenv('PARSE_MAX_PENDING', 8))
+PARSE_MAX_TASKS_PER_CHILD = int(os.getenv('PARSE_MAX_TASKS_PER_CHILD', 50))
+
+
+class ParserBusy(Exception):
+    """Raised when the parse queue is full; the client should retry shortly."""
+
+
+class ParseTimeout(Exception):
+    """Raised when a parse job exceeds its deadline."""
+
+
+class ParseCrashed(ParseTimeout):
+    """Raised when the worker process dies mid-job (e.g. killed for memory)."""
+
+
+def _serve(conn):
+    """Worker process loop: parse each source received on ``conn`` and send back the outcome"""
+    while True:
+        try:
+            source = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send((True, parse_pdf(source)))
+        except Exception as e:
+            conn.send((False, e))
+
+
+class _Worker:
+    """One spawned parse process and the parent's end of its pipe"""
+
+    def __init__(self, ctx):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_serve, args=(child,), name='parse-worker', daemon=True)
+        self.process.start()
+        child.close()
+        self.tasks = 0
+
+    def kill(self):
+        self.conn.close()
+        self.process.kill()
+        self.process.join(1)
+
+
+class ParseExecutor:
+    """Bounded set of worker processes for ``parse_pdf`` jobs.
+
+    At most ``max_pending`` jobs may be running or queued at once; further
+    submissions fail fast with ParserBusy instead of tying up request threads.
+    Each job runs on a worker process of its own and gets ``timeout`` seconds
+    (waiting for a free worker included); a job over its deadline has just its
+    worker killed and replaced, so other in-flight parses are untouched.
+    Workers are recycled after ``max_tasks_per_child`` jobs to bound pdfminer's
+    memory growth. Setting ``workers`` to 0 parses inline in the calling thread.
+    """
+
+    def __init__(self, workers: int = PARSE_WORKERS, timeout: float = PARSE_TIMEOUT,
+                 max_pending: int = PARSE_MAX_PENDING, max_tasks_per_child: int = PARSE_MAX_TASKS_PER_CHILD):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_tasks_per_child = max_tasks_per_child
+        self._slots = threading.BoundedSemaphore(max(max_pending, workers, 1))
+        # spawn rather than fork: the gunicorn worker is multi-threaded
+        self._ctx = multiprocessing.get_context('spawn')
+        # Idle workers; None is a slot whose process has not been started (or was killed)
+        self._idle = queue.LifoQueue()
+        for _ in range(max(workers, 0)):
+            self._idle.put(None)
+        self._lock = threading.Lock()
+        self._live = set()
+        atexit.register(self.shutdown)
+
+    def _checkout(self, deadline: float) -> _Worker:
+        try:
+            worker = self._idle.get(timeout=max(0, deadline - time.monotonic()))
+        except queue.Empty:
+            raise ParseTimeout(f'No parser became free within {self.timeout:.0f} seconds')
+        if worker is None or not worker.process.is_alive():
+            try:
+                worker = _Worker(self._ctx)
+            except Exception:
+                self._idle.put(None)
+                raise
+            with self._lock:
+                self._live.add(worker)
+            logger.info('Started parse worker pid %d', worker.process.pid)
+        return worker
+
+    def _discard(self, worker: _Worker):
+        worker.kill()
+        with self._lock:
+            self._live.discard(worker)
+        self._idle.put(None)
+
+    def parse(self, source):
+        """Parse a schedule PDF and return its course list"""
+        if self.workers <= 0:
+            return parse_pdf(source)
+        if not self._slots.acquire(blocking=False):
+            raise ParserBusy('Too many schedules are being processed right now')
+        try:
+            deadline = time.monotonic() + self.timeout
+            worker = self._checkout(deadline)
+            try:
+                worker.conn.send(source)
+                if not worker.conn.poll(max(0, deadline - time.monotonic())):
+                    logger.warning('Parse job exceeded %.0fs, killing worker pid %d', self.timeout, worker.process.pid)
+                    raise ParseTimeout(f'Parsing took longer than {self.timeout:.0f} seconds')
+                ok, result = worker.conn.recv()
+            except (EOFError, OSError):
+                logger.warning('Parse worker pid %d exited mid-job', worker.process.pid)
+                self._discard(worker)
+                raise ParseCrashed('The parser process exited unexpectedly')
+            except BaseException:
+                self._discard(worker)
+                raise
+            worker.tasks += 1
+            if worker.tasks >= self.max_tasks_per_child > 0:
+                self._discard(worker)
+            else:
+                self._idle.put(worker)
+            if not ok:
+                raise result
+            return result
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        with self._lock:
+            workers, self._live = self._live, set()
+        for worker in workers:
+            worker.kill()
@@ -1,77 +1,344 @@
+import io
+import logging
+import os
 import pdfplumber
 import re
+from bisect import bisect_right
+from pdfminer.layout import LTChar, LTContainer
+from pdfplumber.utils import extract_text_simple
+from config.parser import CAMPUS_LOCATIONS
+from course import Course, date_to_ordinal, days_to_mask, number_slots, semester_year, time_to_minutes
 
+logger = logging.getLogger(__name__)
 
-def extract_text_from_pdf(pdf_path):
-    with pdfplumber.open(pdf_path) as pdf:
-        # Assuming the course schedule is on the second page
-        page = pdf.pages[1]
-        text = page.extract_text()
-    return text
+# Bump whenever parse_schedule output changes so cached parse results are invalidated
+PARSER_VERSION = 5
+
+# Page holding the schedule table (page 1 is the weekly grid)
+SCHEDULE_PAGE = 1
+
+# Columns a continuation row inherits from the course row above it
+INHERITED_COLUMNS = ("Course", "Section", "Instructor", "DeliveryMode")
+
+# One table row: course rows carry Course/Section in front and Instructor/Delivery Mode
+# at the end; continuation rows only have the meeting columns in between.
+_ROW = re.compile(
+    r"(?:(?P<Course>\S+ \S+) (?P<Section>[A-Z]\d{2}\S*) )?"
+    r"(?P<Location>\S+ \S+ \S+) (?P<Days>(?:\S+ )*?)"
+    r"(?P<Start>\d{1,2}:\d{2}) (?P<End>\d{1,2}:\d{2}) "
+    r"(?P<StartDate>\d{1,2}-\w+) (?P<EndDate>\d{1,2}-\w+) (?P<Status>\S+)"
+    r"(?: (?P<Instructor>.+) (?P<DeliveryMode>\S+))?$"
+)
+
+TABLE_HEADER = "Course Section Location Days Start End Start Date End Date Status Instructor Delivery Mode"
+_TABLE_HEADER_CHARS = TABLE_HEADER.replace(" ", "")[:21]  # "CourseSectionLocation"
+_COURSE_ROW_START = re.compile(r"\S+ \S+ [A-Z]\d{2}\S* ")
+
+# Extraction engine: 'text' (page.extract_text + parse_schedule) or 'words' (bounding-box columns)
+PARSER_ENGINE = os.getenv('PDF_PARSER_ENGINE', 'text')
+
+# Text engine extraction mode: 'full' (pdfplumber objects + layout) or 'fast' (table-only chars, see _fast_page_lines)
+PDF_EXTRACT_MODE = os.getenv('PDF_EXTRACT_MODE', 'full')
+
+
+def _pdf_source(source):
+    """Accept a path, raw bytes or a binary file-like object for pdfplumber.open"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    return source
+
+def _has_table_header(page):
+    """Probe a page's raw characters for the table header, skipping the text layout pass"""
+    return _TABLE_HEADER_CHARS in ''.join(c['text'] for c in page.chars if c['text'] != ' ')
+
+def _find_table_page(pages):
+    """Return the index of the page holding the table header, trying SCHEDULE_PAGE first"""
+    order = [SCHEDULE_PAGE] + [i for i in range(len(pages)) if i != SCHEDULE_PAGE]
+    for i in order:
+        if i >= len(pages):
+            continue
+        if _has_table_header(pages[i]):
+            return i
+        pages[i].close()
+    return None
+
+def _is_table_row(line):
+    return line.startswith(CAMPUS_LOCATIONS) or _COURSE_ROW_START.match(line) is not None
+
+def _full_page_lines(pages):
+    """Yield the laid-out text lines of the table pages"""
+    start = _find_table_page(pages)
+    if start is None:
+        return
+    for page in pages[start:]:
+        try:
+            yield (page.extract_text() or '').split('\n')
+        finally:
+            page.close()
+
+def _layout_chars(page):
+    """Return a page's characters as minimal dicts read straight off pdfminer's layout tree.
+
+    Unlike ``page.chars`` this skips pdfplumber's per-object attribute pass
+    (fonts, colours, matrices, colour spaces) and every non-text object.
+    """
+    chars = []
+    stack = [iter(page.layout)]
+    while stack:
+        obj = next(stack[-1], None)
+        if obj is None:
+            stack.pop()
+        elif isinstance(obj, LTChar):
+            top = page.height - obj.y1
+            chars.append({'text': obj.get_text(), 'x0': obj.x0, 'x1': obj.x1, 'top': top, 'doctop': top})
+        elif isinstance(obj, LTContainer):
+            stack.append(iter(obj))
+    return chars
+
+def _table_chars(chars):
+    """Crop characters to the table: everything from the header row down, or None without a header"""
+    solid = [c for c in chars if c['text'] != ' ']
+    at = ''.join(c['text'] for c in solid).find(_TABLE_HEADER_CHARS)
+    if at < 0:
+        return None
+    top = solid[at]['top'] - 1
+    return [c for c in chars if c['top'] >= top]
+
+def _fast_page_lines(pages):
+    """Yield the text lines of the table pages, cropped to the table and clustered without layout.
+
+    Characters above the table header (banner, student details) are dropped
+    and lines are rebuilt with simple row/column clustering instead of
+    pdfplumber's layout text map.
+    """
+    order = [SCHEDULE_PAGE] + [i for i in range(len(pages)) if i != SCHEDULE_PAGE]
+    start = None
+    for i in order:
+        if i >= len(pages):
+            continue
+        try:
+            chars = _table_chars(_layout_chars(pages[i]))
+        finally:
+            pages[i].close()
+        if chars is not None:
+            start = i
+            break
+    if start is None:
+        return
+    yield extract_text_simple(chars).split('\n')
+    for page in pages[start + 1:]:
+        try:
+            chars = _layout_chars(page)
+        finally:
+            page.close()
+        # Continuation pages may or may not repeat the header
+        yield extract_text_simple(_table_chars(chars) or chars).split('\n')
+
+def iter_schedule_lines(source, mode=None):
+    """Yield the schedule table's row lines page by page, stopping as soon as the table ends.
+
+    Pages are laid out one at a time and their pdfplumber caches flushed right
+    after, so memory stays flat regardless of page count. Pages past the end of
+    the table are never opened.
+    """
+    with pdfplumber.open(_pdf_source(source)) as pdf:
+        page_lines = _fast_page_lines if (mode or PDF_EXTRACT_MODE) == 'fast' else _full_page_lines
+        for lines in page_lines(pdf.pages):
+            # Skip the page banner and repeated column header
+            i = 0
+            while i < len(lines) and not lines[i].startswith("Course") and not _is_table_row(lines[i]):
+                i += 1
+            if i < len(lines) and lines[i].startswith("Course"):
+                i += 1
+            if i >= len(lines) or not _is_table_row(lines[i]):
+                return
+            for line in lines[i:]:
+                line = line.strip()
+                if not _is_table_row(line):
+                    return
+                yield line
+
+def extract_text_from_pdf(source, mode=None):
+    """Return the schedule table text from a PDF path, bytes buffer or file-like object"""
+    return '\n'.join([TABLE_HEADER, *iter_schedule_lines(source, mode)])
+
+def parse_pdf(source, engine=None, mode=None):
+    """Extract and parse a schedule PDF in one call (the unit of work for the parse executor).
+
+    In fast mode a PDF that yields no courses is re-parsed with the full layout
+    path, so an unusual layout costs one extra pass instead of an empty schedule.
+    """
+    if (engine or PARSER_ENGINE) == 'words':
+        return extract_courses_from_words(source)
+    mode = mode or PDF_EXTRACT_MODE
+    courses = parse_schedule(extract_text_from_pdf(source, mode))
+    if not courses and mode == 'fast':
+        logger.info("Fast extraction found no courses, falling back to full layout")
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        courses = parse_schedule(extract_text_from_pdf(source, 'full'))
+    return courses
+
+def iter_schedule(text):
+    """Yield one Course per table row of the schedule text, in a single pass.
+
+    Continuation rows (extra meetings that start with a campus name) inherit
+    the course, section, instructor and delivery mode of the row above. Rows
+    that do not look like a meeting are skipped rather than mis-parsed. Rows
+    sharing a time slot are numbered (``number_slots``) so event ids stay unique.
+    """
+    return number_slots(_iter_rows(text))
+
+def _iter_rows(text):
+    lines = iter(text.split('\n'))
+    for line in lines:
+        if line.startswith("Course"):
+            break
+    current = None
+    for line in lines:
+        line = line.strip()
+        match = _ROW.match(line)
+        if match is None:
+            if line:
+                logger.warning("Skipping unrecognised schedule row: %r", line)
+            current = None
+            continue
+        (code, section, location, days, start, end, start_date, end_date,
+         status, instructor, delivery_mode) = match.groups()
+        if code is None:
+            if current is None or not line.startswith(CAMPUS_LOCATIONS):
+                logger.warning("Skipping orphan continuation row: %r", line)
+                continue
+            code, section, instructor, delivery_mode = current
+        else:
+            if instructor is None:
+                instructor = delivery_mode = ""
+            current = code, section, instructor, delivery_mode
+        # Straight to the Course fields (no intermediate dict); the helpers are memoised
+        # and days_to_mask ignores tokens that are not day codes
+        try:
+            year = semester_year(section)
+            yield Course(code, section, location, days_to_mask(days), time_to_minutes(start), time_to_minutes(end),
+                         date_to_ordinal(start_date, year), date_to_ordinal(end_date, year),
+                         status, instructor, delivery_mode)
+        except (ValueError, KeyError) as e:
+            logger.warning("Skipping schedule row with invalid time or date %r: %s", line, e)
 
 def parse_schedule(text):
-    # Same logic as before, but without debug prints
-    course_dict = {
-        "Course": [],
-        "Section": [],
-        "Location": [],
-        "Days": [],
-        "Start": [],
-        "End": [],
-        "StartDate": [],
-        "EndDate": [],
-        "Status": [],
-        "Instructor": [],
-        "DeliveryMode": []
-    }
-    
+    """Parse schedule text into a list of Course records"""
+    return list(iter_schedule(text))
+
+
+# --- Word-coordinate engine ---
+# Header labels as printed in the schedule table, mapped to course keys
+HEADER_COLUMNS = {
+    "Course": "Course",
+    "Section": "Section",
+    "Location": "Location",
+    "Days": "Days",
+    "Start": "Start",
+    "End": "End",
+    "Start Date": "StartDate",
+    "End Date": "EndDate",
+    "Status": "Status",
+    "Instructor": "Instructor",
+    "Delivery Mode": "DeliveryMode",
+}
+LABEL_GAP = 5       # max gap (pt) between words of one header label
+ROW_TOLERANCE = 3   # max vertical offset (pt) between words on one row
+
+# Column boundaries keyed by layout fingerprint (header word positions)
+_COLUMN_CACHE = {}
+_COLUMN_CACHE_MAX = 32
+
+
+def _find_header(words):
+    """Return the header row words (left to right), or None if the page has no table header"""
+    for i, word in enumerate(words):
+        if word['text'] != 'Course':
+            continue
+        row = [w for w in words[i:i + 20] if abs(w['top'] - word['top']) <= ROW_TOLERANCE]
+        if len(row) >= len(HEADER_COLUMNS) and any(w['text'] == 'Instructor' for w in row):
+            return sorted(row, key=lambda w: w['x0'])
+    return None
+
+def _header_labels(header):
+    """Group header words into (label, x0, x1) spans, e.g. 'Start' + 'Date'"""
+    labels = []
+    for w in header:
+        if labels and w['x0'] - labels[-1][2] <= LABEL_GAP:
+            text, x0, _ = labels[-1]
+            labels[-1] = (f"{text} {w['text']}", x0, w['x1'])
+        else:
+            labels.append((w['text'], w['x0'], w['x1']))
+    return labels
+
+def _detect_columns(page, header):
+    """Return (boundaries, keys): the left edge of every column after the first, and the column keys"""
+    labels = [label for label in _header_labels(header) if label[0] in HEADER_COLUMNS]
+    keys = [HEADER_COLUMNS[text] for text, _, _ in labels]
+    top = header[0]['top']
+    # Prefer the ruled header cells; each label sits inside exactly one of them
+    cells = sorted(r['x0'] for r in page.rects if r['top'] <= top <= r['bottom'])
+    if len(cells) == len(labels):
+        return cells[1:], keys
+    # Unruled layout: values are left-aligned and start after the previous label ends
+    return [prev[2] for prev in labels[:-1]], keys
+
+def _columns_for(page, header):
+    fingerprint = tuple(round(w['x0']) for w in header)
+    columns = _COLUMN_CACHE.get(fingerprint)
+    if columns is None:
+        columns = _detect_columns(page, header)
+        if len(_COLUMN_CACHE) >= _COLUMN_CACHE_MAX:
+            _COLUMN_CACHE.pop(next(iter(_COLUMN_CACHE)))
+        _COLUMN_CACHE[fingerprint] = columns
+    return columns
+
+def _rows(words):
+    """Yield the words of each visual row, sorted left to right, in one pass over top-sorted words"""
+    row = []
+    for w in sorted(words, key=lambda w: w['top']):
+        if row and w['top'] - row[0]['top'] > ROW_TOLERANCE:
+            yield sorted(row, key=lambda w: w['x0'])
+            row = []
+        row.append(w)
+    if row:
+        yield sorted(row, key=lambda w: w['x0'])
+
+def _page_courses(words, columns, previous=None):
+    boundaries, keys = columns
     courses = []
-    locations = ["Nanaimo", "Duncan"]
-    days_pattern = r"(Mo|Tu|We|Th|Fr|Sa|Su)"
-    lines = text.split('\n')
-    
-    i = 0
-    while not lines[i].startswith("Course"):
-        i += 1
-    if lines[i].startswith("Course"):
-        i += 1
-    while i < len(lines):
-        current_course = {key: "" for key in course_dict}
-        line = lines[i].strip()
-        columns = line.split()
-        current_course["Course"] = columns[0] + " " + columns[1]
-        current_course["Section"] = columns[2]
-        current_course["Location"] = columns[3] + " " + columns[4] + " " + columns[5]
-        days_list = [col for col in columns[6:-8] if re.fullmatch(days_pattern, col)]
-        current_course["Days"] = ' '.join(days_list) if days_list else ""        
-        current_course["Start"] = columns[-8]
-        current_course["End"] = columns[-7]
-        current_course["StartDate"] = columns[-6]
-        current_course["EndDate"] = columns[-5]
-        current_course["Status"] = columns[-4]
-        current_course["Instructor"] = columns[-3] + " " + columns[-2]
-        current_course["DeliveryMode"] = columns[-1]
-        courses.append(current_course)
-        j = i + 1
-        while j < len(lines) and (lines[j].startswith(locations[0]) or lines[j].startswith(locations[1])):
-            subsequent_course = {key: "" for key in course_dict}
-            next_line = lines[j].strip()
-            columns = next_line.split()
-            subsequent_course["Course"] = current_course["Course"]
-            subsequent_course["Section"] = current_course["Section"]
-            subsequent_course["Location"] = columns[0] + " " + columns[1] + " " + columns[2]
-            days_list = [col for col in columns[3:-5] if re.fullmatch(days_pattern, col)]
-            subsequent_course["Days"] = ' '.join(days_list) if days_list else ""            
-            subsequent_course["Start"] = columns[-5]
-            subsequent_course["End"] = columns[-4]
-            subsequent_course["StartDate"] = columns[-3]
-            subsequent_course["EndDate"] = columns[-2]
-            subsequent_course["Status"] = columns[-1]
-            subsequent_course["Instructor"] = current_course["Instructor"]
-            subsequent_course["DeliveryMode"] = current_course["DeliveryMode"]
-            courses.append(subsequent_course)
-            subsequent_course = {key: "" for key in course_dict}
-            j += 1
-        current_course = {key: "" for key in course_dict}
-        i = j
+    for row in _rows(words):
+        cells = {key: [] for key in keys}
+        for w in row:
+            cells[keys[bisect_right(boundaries, w['x0'])]].append(w['text'])
+        course = {key: ' '.join(cells[key]) for key in keys}
+        if not course['Start']:
+            break  # past the end of the table
+        if not course['Course']:
+            if previous is None:
+                continue
+            for key in INHERITED_COLUMNS:
+                course[key] = previous[key]
+        courses.append(course)
+        previous = course
     return courses
+
+def extract_courses_from_words(source):
+    """Parse the schedule table from word bounding boxes instead of laid-out text"""
+    courses = []
+    with pdfplumber.open(_pdf_source(source)) as pdf:
+        for page in pdf.pages[SCHEDULE_PAGE:]:
+            try:
+                words = page.extract_words()
+                header = _find_header(words)
+                if header is None:
+                    if courses:
+                        break  # the table ended on the previous page
+                    continue
+                body = [w for w in words if w['top'] > header[0]['top'] + ROW_TOLERANCE]
+                courses.extend(_page_courses(body, _columns_for(page, header), courses[-1] if courses else None))
+            finally:
+                page.close()
+    return list(number_slots(Course.from_dict(course) for course in courses))
@@ -0,0 +1,89 @@
+"""
+Course Tests - the Course record: event identity, codecs and legacy dict compatibility
+Usage: python -m pytest tests
+"""
+
+import glob
+import os
+
+import pytest
+
+from course import Course, dumps_courses, loads_courses, number_slots, pack_courses, unpack_courses
+from pdf_parser import parse_pdf
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUNDLED_PDFS = sorted(glob.glob(os.path.join(ROOT, 'static', '*.PDF')) +
+                      glob.glob(os.path.join(ROOT, 'uploads', '*.[Pp][Dd][Ff]')))
+
+LEGACY = {
+    'Course': 'CSCI 101', 'Section': 'F24N01', 'Location': 'Nanaimo 200 106', 'Days': 'Mo We',
+    'Start': '13:00', 'End': '14:30', 'StartDate': '03-SEP', 'EndDate': '06-DEC', 'Status': 'Enrolled',
+    'Instructor': 'NÚÑEZ, JOSÉ', 'DeliveryMode': 'Face-to-Face',
+}
+ASTR = Course('ASTR 112', 'S25N01', 'Nanaimo 315 113', 0b1000, 990, 1110, 739257, 739352,
+              'Enrolled', 'ARKOS GREGORY', 'Face-to-Face')
+
+
+@pytest.mark.parametrize('path', BUNDLED_PDFS, ids=os.path.basename)
+def test_event_ids_unique_within_an_upload(path):
+    courses = parse_pdf(path)
+    assert len({course.event_id for course in courses}) == len(courses)
+    assert len({course.ical_uid for course in courses}) == len(courses)
+
+
+def test_rows_in_the_same_slot_get_their_own_ids():
+    second_room = ASTR._replace(location='Nanaimo 315 216')
+    later_dates = ASTR._replace(start_date=ASTR.end_date + 7, end_date=ASTR.end_date + 35)
+    numbered = list(number_slots([ASTR, second_room, later_dates]))
+    assert [course.slot_index for course in numbered] == [0, 1, 2]
+    assert len({course.event_id for course in numbered}) == 3
+    assert numbered[0] is ASTR
+
+
+def test_room_change_keeps_the_event_id():
+    assert ASTR._replace(location='Nanaimo 200 106').event_id == ASTR.event_id
+    assert ASTR._replace(start=1000).event_id != ASTR.event_id
+
+
+@pytest.fixture(scope='module')
+def courses():
+    return parse_pdf(BUNDLED_PDFS[0]) + [Course.from_dict(LEGACY), ASTR, ASTR._replace(slot_index=1)]
+
+
+def test_pack_round_trip(courses):
+    assert unpack_courses(pack_courses(courses)) == courses
+    assert unpack_courses(pack_courses([])) == []
+
+
+def test_json_round_trip(courses):
+    restored = loads_courses(dumps_courses(courses))
+    assert restored == courses
+    assert all(isinstance(course, Course) for course in restored)
+
+
+def test_from_dict_equals_the_dict():
+    course = Course.from_dict(LEGACY)
+    assert course == LEGACY
+    assert not course != LEGACY
+    assert course != dict(LEGACY, Days='Tu')
+    assert course.to_dict() == LEGACY
+
+
+def test_legacy_key_access():
+    course = Course.from_dict(LEGACY)
+    assert 'Days' in course
+    assert 'Mo We' not in course and 'Missing' not in course
+    assert course['Start'] == '13:00' and course.get('Days') == 'Mo We'
+    assert course.get('Missing', '-') == '-'
+    with pytest.raises(KeyError):
+        course['Missing']
+    assert dict(course) == LEGACY
+    assert list(course.keys()) == list(LEGACY)
+
+
+def test_coerce_accepts_every_stored_form():
+    course = Course.from_dict(LEGACY)
+    assert Course.coerce(course) is course
+    assert Course.coerce(LEGACY) == course
+    assert Course.coerce(list(course)) == course
+    assert Course.coerce(list(course)[:11]) == course  # rows stored before slot_index
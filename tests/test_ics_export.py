@@ -0,0 +1,110 @@
+"""
+ICS Export Tests - RFC 5545 conformance of the streaming writer (iter_ics)
+The streamed document must parse back with icalendar to the same VEVENT properties as
+build_calendar, in valid UTF-8 with no physical line over 75 octets.
+Usage: python -m pytest tests
+"""
+
+import pytest
+from icalendar import Calendar
+
+from benchmarks.synthetic import synthetic_schedule_text
+from course import Course
+from ics_export import MAX_LINE_OCTETS, _content_line, build_calendar, escape_text, iter_ics
+from pdf_parser import parse_schedule
+
+# Rows whose text needs escaping and folding: commas, semicolons, backslashes, newlines,
+# multi-byte characters straddling the 75-octet boundary
+AWKWARD = [Course.from_dict(dict(zip(
+    ('Course', 'Section', 'Location', 'Days', 'Start', 'End', 'StartDate', 'EndDate', 'Status', 'Instructor',
+     'DeliveryMode'), row))) for row in [
+    ('CSCI 101', 'F24N01', 'Nanaimo 200 106', 'Mo We', '13:00', '14:30', '03-SEP', '06-DEC', 'Enrolled',
+     'NÚÑEZ, JOSÉ; "PEPE" \\ O\'BRIEN', 'Face-to-Face'),
+    ('ENGL 215', 'S25N03', 'Online; see D2L, section\nnotes ' + 'é' * 40, 'Fr', '09:00', '10:00', '06-JAN', '11-APR',
+     'Waitlisted', 'ZHAO 赵' * 12, 'Online\\Async'),
+    ('MATH 122', 'F24N02', 'Cowichan 100 🎓 ' + ',' * 70, '', '10:00', '11:00', '03-SEP', '06-DEC', 'Enrolled',
+     '\\' * 90, 'Blended'),
+]]
+
+
+def event_properties(document: bytes):
+    """Each VEVENT's properties as a sorted tuple of (name, serialized value)"""
+    calendar = Calendar.from_ical(document)
+    return [tuple(sorted((name, value.to_ical()) for name, value in event.property_items()[1:-1]))
+            for event in calendar.walk('VEVENT')]
+
+
+def unfold(document: bytes) -> bytes:
+    """Undo RFC 5545 line folding"""
+    return document.replace(b'\r\n ', b'')
+
+
+@pytest.fixture(scope='module')
+def courses():
+    return parse_schedule(synthetic_schedule_text(200)) + AWKWARD
+
+
+def test_lines_fit_in_75_octets(courses):
+    streamed = b''.join(iter_ics(courses))
+    assert streamed.endswith(b'\r\n')
+    for line in streamed[:-2].split(b'\r\n'):
+        assert len(line) <= MAX_LINE_OCTETS, line
+
+
+def test_output_is_valid_utf8(courses):
+    b''.join(iter_ics(courses)).decode('utf-8')
+
+
+def test_matches_icalendar(courses):
+    expected = event_properties(build_calendar(courses).to_ical())
+    actual = event_properties(b''.join(iter_ics(courses)))
+    assert len(actual) == len(courses)
+    assert actual == expected
+
+
+@pytest.mark.parametrize('value', [
+    'é' * 80,
+    'x' + '赵' * 40,
+    'ab' + '🎓' * 30,
+    'NÚÑEZ, JOSÉ; ' * 10,
+])
+def test_folding_never_splits_a_character(value):
+    line = _content_line('DESCRIPTION', value)
+    physical = line[:-2].split(b'\r\n')
+    assert len(physical) > 1
+    for part in physical:
+        assert len(part) <= MAX_LINE_OCTETS
+        part.decode('utf-8')  # each physical line is whole characters
+    assert all(part.startswith(b' ') for part in physical[1:])
+    assert unfold(line) == f"DESCRIPTION:{value}\r\n".encode('utf-8')
+
+
+def test_folding_keeps_escapes_together():
+    line = _content_line('DESCRIPTION', escape_text('\\' * 90 + ',;' * 20))
+    physical = line[:-2].split(b'\r\n ')
+    logical = b''.join(physical)
+    fold = 0
+    for part in physical[:-1]:
+        fold += len(part)
+        # an even run of backslashes before each fold means no escape pair was split
+        run = len(logical[:fold]) - len(logical[:fold].rstrip(b'\\'))
+        assert run % 2 == 0, fold
+
+
+def test_short_lines_are_not_folded():
+    assert _content_line('SUMMARY', 'CSCI 101') == b'SUMMARY:CSCI 101\r\n'
+    exact = 'x' * (MAX_LINE_OCTETS - len('SUMMARY:'))
+    assert _content_line('SUMMARY', exact) == f'SUMMARY:{exact}\r\n'.encode()
+
+
+@pytest.mark.parametrize('value, escaped', [
+    ('a,b', 'a\\,b'),
+    ('a;b', 'a\\;b'),
+    ('a\\b', 'a\\\\b'),
+    ('a\nb', 'a\\nb'),
+    ('a\r\nb', 'a\\nb'),
+    ('\\,', '\\\\\\,'),
+    ('plain text', 'plain text'),
+])
+def test_escape_text(value, escaped):
+    assert escape_text(value) == escaped
@@ -0,0 +1,61 @@
+"""
+PDF Parser Tests - rows parsed from the bundled demo schedule by every engine, and
+parse_schedule against the positional parser it replaced
+Usage: python -m pytest tests
+"""
+
+import os
+
+import pytest
+
+from benchmarks.bench_parse_schedule import legacy_parse_schedule
+from benchmarks.synthetic import synthetic_schedule_text
+from pdf_parser import TABLE_HEADER, parse_pdf, parse_schedule
+
+DEMO_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        'static', 'DemoCourseSchedule.PDF')
+
+DEMO_ROWS = [
+    ('CSCI 360', 'F24N02', 'Nanaimo 200 106', 'Mo We', '13:00', '14:30', '03-SEP', '06-DEC', 'Enrolled', 'KABOOM HUFFLYUN', 'Face-to-Face'),
+    ('CSCI 360', 'F24N02', 'Nanaimo 315 115', 'Mo', '09:00', '10:00', '03-SEP', '06-DEC', 'Enrolled', 'KABOOM HUFFLYUN', 'Face-to-Face'),
+    ('CSCI 478', 'F24N01', 'Nanaimo 210 225', 'Tu Th', '10:00', '11:30', '03-SEP', '06-DEC', 'Enrolled', 'MACARONI LUIS', 'Face-to-Face'),
+    ('CSCI 478', 'F24N01', 'Nanaimo 315 115', 'Th', '15:30', '17:30', '03-SEP', '06-DEC', 'Enrolled', 'MACARONI LUIS', 'Face-to-Face'),
+    ('MATH 122', 'F24N01', 'Nanaimo 460 323', 'Mo We', '10:00', '11:30', '03-SEP', '06-DEC', 'Enrolled', 'BOBROVSKY BEANS', 'Face-to-Face'),
+    ('MATH 122', 'F24N01', 'Nanaimo 460 324', 'Fr', '10:30', '11:30', '03-SEP', '06-DEC', 'Enrolled', 'BOBROVSKY BEANS', 'Face-to-Face'),
+    ('MATH 223', 'F24N02', 'Nanaimo 200 105', 'Tu Th', '08:30', '10:00', '03-SEP', '06-DEC', 'Enrolled', 'HUGGY KISSERSON', 'Face-to-Face'),
+    ('MATH 223', 'F24N02', 'Nanaimo 200 105', 'Fr', '11:30', '12:30', '03-SEP', '06-DEC', 'Enrolled', 'HUGGY KISSERSON', 'Face-to-Face'),
+    ('PHIL 112', 'F24N02', 'Nanaimo 356 315', 'Tu Th', '13:00', '14:30', '03-SEP', '06-DEC', 'Enrolled', 'CLEMENTINE OCASIO', 'Face-to-Face'),
+]
+
+
+@pytest.mark.parametrize('engine, mode', [('text', 'full'), ('text', 'fast'), ('words', None)])
+def test_demo_schedule(engine, mode):
+    courses = parse_pdf(DEMO_PDF, engine, mode)
+    assert [tuple(course.values()) for course in courses] == DEMO_ROWS
+
+
+def test_parse_schedule_matches_legacy_parser():
+    text = synthetic_schedule_text(300)
+    assert [course.to_dict() for course in parse_schedule(text)] == legacy_parse_schedule(text)
+
+
+def test_continuation_rows_inherit_the_course_above():
+    text = '\n'.join([
+        TABLE_HEADER,
+        'CSCI 101 F24N01 Nanaimo 200 106 Mo We 13:00 14:30 03-SEP 06-DEC Enrolled NUNEZ JOSE Face-to-Face',
+        'Duncan 100 101 Fr 09:00 10:00 03-SEP 06-DEC Enrolled',
+    ])
+    first, second = parse_schedule(text)
+    assert (second['Course'], second['Section'], second['Location']) == ('CSCI 101', 'F24N01', 'Duncan 100 101')
+    assert (second['Instructor'], second['DeliveryMode']) == (first['Instructor'], first['DeliveryMode'])
+
+
+def test_unrecognised_and_orphan_rows_are_skipped():
+    text = '\n'.join([
+        TABLE_HEADER,
+        'Nanaimo 200 106 Fr 09:00 10:00 03-SEP 06-DEC Enrolled',
+        'Page 2 of 2',
+        'CSCI 101 F24N01 Nanaimo 200 106 Mo 13:00 14:30 03-SEP 06-DEC Enrolled NUNEZ JOSE Face-to-Face',
+        'CSCI 102 F24N01 Nanaimo 200 106 Mo 13:00 14:30 31-FEB 06-DEC Enrolled NUNEZ JOSE Face-to-Face',
+    ])
+    assert [course['Course'] for course in parse_schedule(text)] == ['CSCI 101']
@@ -0,0 +1,258 @@
+"""
+Upload Store - parsed course lists for in-flight uploads, keyed by upload_id
+Either bounded in-process memory (single worker) or Redis shared by every worker and container
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import redis
+
+from course import pack_courses, unpack_courses
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_STORE_BACKEND = os.getenv('UPLOAD_STORE', 'memory')  # 'memory' or 'redis'
+UPLOAD_STORE_MAX_BYTES = int(os.getenv('UPLOAD_STORE_MAX_BYTES', 64 * 1024 * 1024))  # 64 MB
+UPLOAD_STORE_TTL = int(os.getenv('UPLOAD_STORE_TTL', 3600))  # idle seconds
+# In-process read-through layer in front of Redis (0 bytes disables it)
+UPLOAD_STORE_L1_BYTES = int(os.getenv('UPLOAD_STORE_L1_BYTES', 4 * 1024 * 1024))
+UPLOAD_STORE_L1_TTL = int(os.getenv('UPLOAD_STORE_L1_TTL', 30))
+
+
+def approximate_size(courses) -> int:
+    """Rough in-memory footprint of a course list in bytes (list, records and their fields)"""
+    size = sys.getsizeof(courses)
+    for course in courses:
+        size += sys.getsizeof(course) + sum(sys.getsizeof(value) for value in course)
+    return size
+
+
+class MemoryUploadStore:
+    """In-process LRU store of parsed uploads.
+
+    Each entry's approximate size is tracked; once the total passes
+    ``max_bytes`` the least recently used uploads are evicted. Entries not read
+    for ``ttl`` seconds expire. Lookups of an evicted or expired upload return
+    None, which callers treat as "please upload again".
+    """
+
+    def __init__(self, max_bytes: int = UPLOAD_STORE_MAX_BYTES, ttl: int = UPLOAD_STORE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # upload_id -> (courses, size, last access)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {'puts': 0, 'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+    def _drop(self, upload_id, reason):
+        _, size, _ = self._entries.pop(upload_id)
+        self._bytes -= size
+        self._counters[reason] += 1
+
+    def _expire(self, now):
+        # Entries are kept in access order, so expired ones are all at the front
+        while self._entries:
+            upload_id, (_, _, accessed) = next(iter(self._entries.items()))
+            if now - accessed <= self.ttl:
+                break
+            self._drop(upload_id, 'expirations')
+
+    def get(self, upload_id):
+        """Return the course list for ``upload_id``, or None if unknown, evicted or expired"""
+        if not upload_id:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(upload_id)
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            courses, size, _ = entry
+            self._entries[upload_id] = (courses, size, now)
+            self._entries.move_to_end(upload_id)
+            self._counters['hits'] += 1
+            return courses
+
+    def put(self, upload_id, courses):
+        """Store a course list, evicting least recently used uploads over the memory budget"""
+        size = approximate_size(courses)
+        now = time.monotonic()
+        with self._lock:
+            previous = self._entries.pop(upload_id, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[upload_id] = (courses, size, now)
+            self._bytes += size
+            self._counters['puts'] += 1
+            self._expire(now)
+            evicted = 0
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                self._drop(next(iter(self._entries)), 'evictions')
+                evicted += 1
+        if evicted:
+            logger.info('Upload store evicted %d uploads to stay under %d bytes', evicted, self.max_bytes)
+
+    def pop(self, upload_id):
+        """Remove and return the course list for ``upload_id`` (None if absent)"""
+        with self._lock:
+            entry = self._entries.pop(upload_id, None)
+            if entry is None:
+                return None
+            self._bytes -= entry[1]
+            return entry[0]
+
+    def stats(self) -> dict:
+        """Return entry count, memory use and eviction counters"""
+        with self._lock:
+            self._expire(time.monotonic())
+            counters = dict(self._counters)
+            entries, used = len(self._entries), self._bytes
+        lookups = counters['hits'] + counters['misses']
+        return {
+            'backend': 'memory',
+            'entries': entries,
+            'bytes': used,
+            'max_bytes': self.max_bytes,
+            'ttl_seconds': self.ttl,
+            'uploads': counters['puts'],
+            'evictions': counters['evictions'],
+            'expirations': counters['expirations'],
+            'eviction_rate': round(counters['evictions'] / counters['puts'] * 100, 1) if counters['puts'] else 0,
+            'hit_rate': round(counters['hits'] / lookups * 100, 1) if lookups else 0,
+        }
+
+
+class RedisUploadStore:
+    """Redis store of parsed uploads, shared by every gunicorn worker and container.
+
+    Course lists are stored packed (see ``course.pack_courses``) and
+    zlib-compressed, and expire after ``ttl`` idle seconds; every read
+    refreshes the TTL. An optional small MemoryUploadStore in front of Redis
+    serves repeat reads from the same worker without fetching the data; a hit
+    still refreshes the Redis TTL at most once per L1 TTL window, so the upload
+    stays alive for other workers and the job worker. Its short TTL bounds how
+    long a worker can keep serving an upload popped elsewhere.
+    """
+
+    PREFIX = 'upload'
+
+    def __init__(self, redis_client, ttl: int = UPLOAD_STORE_TTL,
+                 l1_bytes: int = UPLOAD_STORE_L1_BYTES, l1_ttl: int = UPLOAD_STORE_L1_TTL):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.l1 = MemoryUploadStore(l1_bytes, l1_ttl) if l1_bytes > 0 else None
+        self.stats_key = f"{self.PREFIX}:stats"
+        self._refreshed = {}  # upload_id -> monotonic time its Redis TTL was last pushed out
+        self._refresh_lock = threading.Lock()
+
+    def _mark_refreshed(self, upload_id, now=None):
+        now = time.monotonic() if now is None else now
+        with self._refresh_lock:
+            self._refreshed[upload_id] = now
+            if len(self._refreshed) > 1024:
+                horizon = now - self.l1.ttl
+                self._refreshed = {k: t for k, t in self._refreshed.items() if t > horizon}
+
+    def _refresh_due(self, upload_id) -> bool:
+        """Claim the TTL refresh for an L1 hit if the last one is over an L1 TTL ago"""
+        now = time.monotonic()
+        with self._refresh_lock:
+            if now - self._refreshed.get(upload_id, float('-inf')) < self.l1.ttl:
+                return False
+            self._refreshed[upload_id] = now
+        return True
+
+    def _key(self, upload_id: str) -> str:
+        return f"{self.PREFIX}:{upload_id}"
+
+    def get(self, upload_id):
+        """Return the course list for ``upload_id``, or None if unknown or expired"""
+        if not upload_id:
+            return None
+        if self.l1 is not None:
+            courses = self.l1.get(upload_id)
+            if courses is not None:
+                if self._refresh_due(upload_id):
+                    try:
+                        if not self.redis.expire(self._key(upload_id), self.ttl):
+                            # Popped or expired in Redis: stop serving the local copy
+                            self.l1.pop(upload_id)
+                            return None
+                    except redis.RedisError as e:
+                        logger.warning('Upload store TTL refresh failed for %s: %s', upload_id, e)
+                return courses
+        key = self._key(upload_id)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.expire(key, self.ttl)
+            pipe.hincrby(self.stats_key, 'lookups', 1)
+            raw = pipe.execute()[0]
+            if raw is None:
+                self.redis.hincrby(self.stats_key, 'misses', 1)
+                return None
+            courses = unpack_courses(zlib.decompress(raw))
+        except (redis.RedisError, zlib.error, ValueError) as e:
+            logger.warning('Upload store lookup failed for %s: %s', upload_id, e)
+            return None
+        if self.l1 is not None:
+            self.l1.put(upload_id, courses)
+            self._mark_refreshed(upload_id)
+        return courses
+
+    def put(self, upload_id, courses):
+        """Store a course list; Redis errors propagate so the upload fails visibly"""
+        data = zlib.compress(pack_courses(courses))
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.set(self._key(upload_id), data, ex=self.ttl)
+        pipe.hincrby(self.stats_key, 'uploads', 1)
+        pipe.hincrby(self.stats_key, 'bytes_stored', len(data))
+        pipe.execute()
+        if self.l1 is not None:
+            self.l1.put(upload_id, courses)
+            self._mark_refreshed(upload_id)
+
+    def pop(self, upload_id):
+        """Remove and return the course list for ``upload_id`` (None if absent)"""
+        if self.l1 is not None:
+            self.l1.pop(upload_id)
+            with self._refresh_lock:
+                self._refreshed.pop(upload_id, None)
+        try:
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.get(self._key(upload_id))
+            pipe.delete(self._key(upload_id))
+            raw = pipe.execute()[0]
+            return unpack_courses(zlib.decompress(raw)) if raw is not None else None
+        except (redis.RedisError, zlib.error, ValueError) as e:
+            logger.warning('Upload store pop failed for %s: %s', upload_id, e)
+            return None
+
+    def stats(self) -> dict:
+        """Return shared hit/miss counters, average stored size and the local read-through layer's stats"""
+        raw = {k.decode() if isinstance(k, bytes) else k: int(v) for k, v in self.redis.hgetall(self.stats_key).items()}
+        lookups, misses, uploads = raw.get('lookups', 0), raw.get('misses', 0), raw.get('uploads', 0)
+        return {
+            'backend': 'redis',
+            'ttl_seconds': self.ttl,
+            'uploads': uploads,
+            'avg_stored_bytes': round(raw.get('bytes_stored', 0) / uploads) if uploads else 0,
+            'hit_rate': round((lookups - misses) / lookups * 100, 1) if lookups else 0,
+            'misses': misses,
+            'l1': self.l1.stats() if self.l1 is not None else None,
+        }
+
+
+def create_upload_store(redis_url: str):
+    """Build the store selected by UPLOAD_STORE ('memory' or 'redis')"""
+    if UPLOAD_STORE_BACKEND == 'redis':
+        # Binary client: values are compressed bytes, not text
+        return RedisUploadStore(redis.Redis.from_url(redis_url))
+    return MemoryUploadStore()
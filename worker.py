@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Calendar Worker - creates calendar events for jobs queued by the web app
+Runs outside gunicorn so slow or hung Calendar API calls never hold a request thread.
+
+Usage:
+  python worker.py
+  GOOGLE_CALENDAR_API_ROOT=http://localhost:8085/ python worker.py   # against fake_calendar_server.py
+"""
+
+import json
+import logging
+import os
+import signal
+import time
+
+import redis
+from dotenv import load_dotenv
+from google.oauth2.credentials import Credentials
+
+from calendar_providers.google import GoogleCalendarProvider
+from config import logging as logging_config  # noqa: F401 - configures logging
+from event_creation import EventCreator, RateLimiter
+from event_jobs import JobQueue
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv('REDIS_URL', 'redis://redis:6379/0')
+
+PROVIDERS = {'google': GoogleCalendarProvider()}
+
+
+def load_credentials(credentials_json: str) -> Credentials:
+    """Rebuild OAuth credentials from Credentials.to_json() (refresh_token may be absent)"""
+    info = json.loads(credentials_json)
+    return Credentials(
+        token=info.get('token'),
+        refresh_token=info.get('refresh_token'),
+        token_uri=info.get('token_uri'),
+        client_id=info.get('client_id'),
+        client_secret=info.get('client_secret'),
+        scopes=info.get('scopes'),
+    )
+
+
+def outcome(event, error) -> str:
+    if error is not None:
+        return 'failed'
+    if event.get('already_present'):
+        return 'present'
+    return 'updated' if event.get('updated') else 'created'
+
+
+def run_job(queue: JobQueue, creator: EventCreator, job_id: str, payload: dict):
+    provider = PROVIDERS.get(payload['provider'])
+    if provider is None:
+        queue.finish(job_id, error=f"Unsupported provider {payload['provider']}")
+        return
+    provider = provider.for_upload(payload.get('upload_digest'))
+    courses = payload['courses']
+    mode = payload.get('mode', 'create')
+    logger.info('Job %s: %s %d %s events', job_id, 'syncing' if mode == 'sync' else 'creating',
+                len(courses), payload['provider'])
+    record = lambda course, event, error: queue.record(job_id, outcome(event, error))  # noqa: E731
+    try:
+        credentials = load_credentials(payload['credentials'])
+        service = provider.build_service(credentials)
+        with queue.keep_alive(job_id):
+            if mode == 'sync':
+                created, failed, deleted = creator.sync_events(provider, service, courses, credentials,
+                                                               on_result=record, schedule=payload.get('schedule'))
+            else:
+                created, failed = creator.create_events(provider, service, courses, credentials, on_result=record)
+                deleted = 0
+    except Exception as e:
+        logger.exception('Job %s failed', job_id)
+        queue.finish(job_id, error=str(e))
+        return
+    counts = {'created': 0, 'present': 0, 'updated': 0, 'deleted': deleted}
+    for _, event in created:
+        counts[outcome(event, None)] += 1
+    # Not every outcome is guaranteed to carry an organizer: take the first that does
+    calendar_email = next((event['organizer']['email'] for _, event in created
+                           if event.get('organizer', {}).get('email')), None)
+    queue.finish(
+        job_id,
+        events=[(event['id'], event.get('summary', '')) for _, event in created],
+        failures=[course['Course'] for course, _ in failed],
+        calendar_email=calendar_email,
+        counts=counts,
+    )
+    logger.info('Job %s finished: %d created, %d already present, %d updated, %d deleted, %d failed',
+                job_id, counts['created'], counts['present'], counts['updated'], deleted, len(failed))
+
+
+def main():
+    redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+    queue = JobQueue(redis_client)
+    creator = EventCreator(RateLimiter(redis_client))
+
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    logger.info('Calendar worker waiting for jobs on %s', JobQueue.QUEUE_KEY)
+    while not stopping:
+        try:
+            # Jobs whose worker died mid-run go back on the queue (or fail after JOB_MAX_ATTEMPTS)
+            queue.requeue_stale()
+            job = queue.claim(timeout=5)
+        except redis.RedisError as e:
+            logger.warning('Redis unavailable, retrying: %s', e)
+            time.sleep(5)
+            continue
+        if job is not None:
+            run_job(queue, creator, *job)
+    logger.info('Calendar worker stopped')
+
+
+if __name__ == "__main__":
+    main()